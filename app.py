@@ -1,10 +1,18 @@
 import streamlit as st
 import time
 import os
-from questions import get_categories, get_point_values, build_board
-from scoring import save_score, get_top_scores, SCORES_FILE
-from timer import QUESTION_TIME_LIMIT, get_time_remaining, get_time_bonus, is_time_up
-from sounds import play_sound, generate_correct_sound, generate_wrong_sound, generate_select_sound, generate_victory_sound
+from questions import build_board
+from scoring import save_scores, get_top_scores, clear_scores
+from timer import QUESTION_TIME_LIMIT
+from sounds import play_effect, warm_sound_cache
+from widgets import sfx_player, question_timer
+import rerun_stats
+import reaction_times
+import metrics
+import buzzer
+import engine
+import gamelog
+import question_stats
 
 st.set_page_config(page_title="Khantushig's Jeopardy", page_icon="🎯", layout="wide")
 
@@ -120,119 +128,186 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-POINT_VALUES = get_point_values()
+# "sprite": effects are loaded by the browser once per session and each event
+# sends only a trigger. "inline": every event embeds the whole WAV.
+SFX_DELIVERY = os.environ.get("QUIZ_SFX_DELIVERY", "sprite")
+warm_sound_cache()
+GAME_SCREENS = ("board", "question")
+# How long a correct award waits for the timer component's client-side
+# elapsed time before falling back to server time.
+TIMER_REPLY_TIMEOUT = 3.0
+# Set QUIZ_FRAGMENTS=0 to render every interaction as a full script run, e.g.
+# to compare against the fragment timings from QUIZ_RERUN_STATS=1.
+USE_FRAGMENTS = os.environ.get("QUIZ_FRAGMENTS", "1") != "0"
+# How often the question screen picks up new buzzes when QUIZ_BUZZER is set.
+BUZZ_POLL_INTERVAL = 0.25
+# How often a pending award checks TIMER_REPLY_TIMEOUT.
+AWARD_POLL_INTERVAL = 0.5
+GAME_FRAGMENT = "game"
+
+def fragment(func=None, **kwargs):
+    if func is None:
+        return lambda f: fragment(f, **kwargs)
+    return st.fragment(func, **kwargs) if USE_FRAGMENTS else func
+
+def rerun_game():
+    # For callbacks that can fire inside show_game_waiting: rerun show_game
+    # itself, which drops the waiting view and stops its polling.
+    if USE_FRAGMENTS:
+        st.rerun(GAME_FRAGMENT)
+
+# The game itself is an engine.Room shared through engine.rooms; session state
+# only holds this viewer's room code and UI bits (pending sound, timer request).
 
 def init_state():
     defaults = {
-        "screen": "start",
-        "players": [],
-        "scores": {},
-        "board": None,
-        "used": set(),
-        "current_q": None,
-        "current_cat": None,
-        "current_pts": 0,
-        "history": [],
+        "room_code": None,
         "num_players": 2,
-        "show_answer": False,
-        "question_start_time": None,
         "last_bonus": None,
         "play_sfx": None,
+        "sfx_event_id": 0,
+        "question_seq": 0,
+        "timer_request_id": 0,
+        "pending_award": None,
+        "save_handle": None,
+        "buzzer_error": None,
     }
     for key, val in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = val
 
+def get_room():
+    code = st.session_state.room_code
+    return engine.rooms.get(code) if code else None
+
+def current_screen():
+    room = get_room()
+    return "start" if room is None else room.screen
+
 def clear_all_scores():
-    if os.path.exists(SCORES_FILE):
-        os.remove(SCORES_FILE)
+    clear_scores()
+    reaction_times.get_store().clear()
+
+def start_game(names):
+    room = engine.rooms.create(names, build_board(selector=question_stats.get_selector()))
+    gamelog.GameRecorder(room).attach()
+    st.session_state.room_code = room.code
+    st.session_state.last_bonus = None
+    st.session_state.save_handle = None
+    st.session_state.pending_award = None
 
 def reset_to_start():
-    st.session_state.screen = "start"
-    st.session_state.players = []
-    st.session_state.scores = {}
-    st.session_state.board = None
-    st.session_state.used = set()
-    st.session_state.current_q = None
-    st.session_state.history = []
-    st.session_state.show_answer = False
-    st.session_state.question_start_time = None
+    if st.session_state.room_code:
+        engine.rooms.remove(st.session_state.room_code)
+    st.session_state.room_code = None
     st.session_state.last_bonus = None
+    st.session_state.save_handle = None
+    st.session_state.pending_award = None
+
+def get_buzzer():
+    # A buzzer that fails to start is reported on the board and retried on
+    # the next call instead of taking the game down with it.
+    try:
+        server = buzzer.get_server()
+    except (OSError, ValueError, ImportError) as e:
+        st.session_state.buzzer_error = str(e)
+        return None
+    st.session_state.buzzer_error = None
+    return server
+
+def close_buzzer():
+    server = get_buzzer()
+    if server is not None and st.session_state.room_code:
+        server.close_question(st.session_state.room_code)
+
+def end_game():
+    get_room().end()
+    st.session_state.play_sfx = "victory"
+
+# Everyone viewing a room shares it, so a click can arrive after another
+# viewer already changed what it acts on. The room refuses those with
+# ValueError; the callbacks drop them and the rerun shows the room as it is.
 
 def pick_question(cat, pts):
-    st.session_state.current_q = st.session_state.board[cat][pts]
-    st.session_state.current_cat = cat
-    st.session_state.current_pts = pts
-    st.session_state.show_answer = False
-    st.session_state.question_start_time = time.time()
+    try:
+        q = get_room().pick(cat, pts)
+    except ValueError:
+        rerun_game()
+        return
+    question_stats.get_selector().shown(cat, q)
     st.session_state.last_bonus = None
-    st.session_state.timer_frozen_at = None
+    st.session_state.question_seq += 1
+    st.session_state.pending_award = None
     st.session_state.play_sfx = "select"
-    st.session_state.screen = "question"
-
-def award_points(player, correct):
-    pts = st.session_state.current_pts
-    cat = st.session_state.current_cat
-    q = st.session_state.current_q
-
-    if correct:
-        freeze = st.session_state.get("timer_frozen_at") or time.time()
-        elapsed = freeze - st.session_state.question_start_time
-        if elapsed <= 10:
-            bonus = 1.5
-        elif elapsed <= 20:
-            bonus = 1.0
-        else:
-            bonus = 0.5
-        earned = int(pts * bonus)
-        st.session_state.scores[player] += earned
-        st.session_state.last_bonus = bonus
-        st.session_state.play_sfx = "correct"
-    else:
-        st.session_state.scores[player] -= pts
-        earned = -pts
-        st.session_state.last_bonus = None
-        st.session_state.play_sfx = "wrong"
-
-    key = f"{cat}_{pts}"
-    st.session_state.used.add(key)
-    st.session_state.history.append({
-        "player": player,
-        "category": cat,
-        "question": q["question"],
-        "answer": q["answer"],
-        "correct": correct,
-        "earned": earned,
-        "bonus": bonus if correct else None,
-    })
-
-    total_cells = len(get_categories()) * len(POINT_VALUES)
-    if len(st.session_state.used) >= total_cells:
-        st.session_state.screen = "final"
+    server = get_buzzer()
+    if server is not None:
+        server.open_question(st.session_state.room_code, st.session_state.question_seq)
+    rerun_game()
+
+def finish_turn(room):
+    st.session_state.pending_award = None
+    close_buzzer()
+    if room.finished:
         st.session_state.play_sfx = "victory"
-    else:
-        st.session_state.screen = "board"
+
+def record_result(room, turn):
+    # Feeds question_stats, which weights future boards by how hard each
+    # question turned out to be.
+    cat, pts = room.cell_info(turn.cell)
+    question_stats.get_selector().observe(cat, room.board[cat][pts], turn.correct, turn.elapsed)
+
+def award_points(player, correct, elapsed=None):
+    room = get_room()
+    try:
+        turn = room.award(player, correct, elapsed)
+    except ValueError:
+        st.session_state.pending_award = None
+        return
+    record_result(room, turn)
+    st.session_state.last_bonus = turn.bonus
+    st.session_state.play_sfx = "correct" if correct else "wrong"
+    finish_turn(room)
+
+def request_award(player):
+    # A correct answer's bonus depends on exactly when the host clicked, which
+    # the timer component measures in the browser. Ask it, and finish the
+    # award in resolve_pending_award() when its reply arrives.
+    st.session_state.timer_request_id += 1
+    st.session_state.pending_award = {
+        "player": player,
+        "request": st.session_state.timer_request_id,
+        "requested_at": time.time(),
+    }
+
+def resolve_pending_award():
+    pending = st.session_state.pending_award
+    if pending is None:
+        return
+    reply = st.session_state.get("question_timer")
+    if reply and reply.get("request") == pending["request"]:
+        award_points(pending["player"], True, elapsed=reply["elapsed"])
+    elif time.time() - pending["requested_at"] > TIMER_REPLY_TIMEOUT:
+        # Fallback when the timer component hasn't reported: server time,
+        # which includes however long the click took to reach us.
+        award_points(pending["player"], True, elapsed=get_room().elapsed(pending["requested_at"]))
+
+def timer_replied():
+    resolve_pending_award()
+    rerun_game()
 
 def skip_question():
-    key = f"{st.session_state.current_cat}_{st.session_state.current_pts}"
-    st.session_state.used.add(key)
-    st.session_state.history.append({
-        "player": "Nobody",
-        "category": st.session_state.current_cat,
-        "question": st.session_state.current_q["question"],
-        "answer": st.session_state.current_q["answer"],
-        "correct": False,
-        "earned": 0,
-    })
-    total_cells = len(get_categories()) * len(POINT_VALUES)
-    if len(st.session_state.used) >= total_cells:
-        st.session_state.screen = "final"
-        st.session_state.play_sfx = "victory"
-    else:
-        st.session_state.screen = "board"
+    room = get_room()
+    try:
+        turn = room.skip()
+    except ValueError:
+        st.session_state.pending_award = None
+        return
+    record_result(room, turn)
+    finish_turn(room)
 
 # ---- SCREENS ----
 
+@metrics.timed("screen.show_start")
 def show_start():
     st.markdown('<h1 class="main-title">🎯 JEOPARDY</h1>', unsafe_allow_html=True)
     st.markdown('<p class="subtitle">by Khantushig Batbold</p>', unsafe_allow_html=True)
@@ -267,12 +342,7 @@ def show_start():
         st.write("")
 
         if st.button("🚀 START GAME", type="primary", use_container_width=True):
-            st.session_state.players = names
-            st.session_state.board = build_board()
-            st.session_state.scores = {p: 0 for p in names}
-            st.session_state.used = set()
-            st.session_state.history = []
-            st.session_state.screen = "board"
+            start_game(names)
             st.rerun()
 
         st.write("")
@@ -289,13 +359,11 @@ def show_start():
                 st.rerun()
 
 def show_scoreboard():
-    players = st.session_state.players
-    scores = st.session_state.scores
-    cols = st.columns(len(players))
+    room = get_room()
+    cols = st.columns(len(room.players))
 
-    for i, player in enumerate(players):
+    for i, (player, score) in enumerate(zip(room.players, room.scores)):
         with cols[i]:
-            score = scores[player]
             emoji = "🔥" if score > 0 else "💀" if score < 0 else "😐"
             color_class = "score-positive" if score >= 0 else "score-negative"
             st.markdown(f"""
@@ -305,59 +373,86 @@ def show_scoreboard():
                 </div>
             """, unsafe_allow_html=True)
 
+@metrics.timed("screen.show_board")
 def show_board():
-    st.markdown('<h1 class="main-title">🎯 JEOPARDY</h1>', unsafe_allow_html=True)
-    st.write("")
-    show_scoreboard()
-    st.write("")
-    st.divider()
-
-    categories = list(st.session_state.board.keys())
-    cols = st.columns(len(categories))
+    room = get_room()
+    cols = st.columns(len(room.categories))
 
-    for col_idx, cat in enumerate(categories):
+    for col_idx, cat in enumerate(room.categories):
         with cols[col_idx]:
             st.markdown(f'<p class="category-header">{cat.upper()}</p>', unsafe_allow_html=True)
-            for pts in POINT_VALUES:
+            for pts in room.point_values:
                 key = f"{cat}_{pts}"
-                if key in st.session_state.used:
+                if room.is_used(cat, pts):
                     st.button("✓", key=f"btn_{key}", disabled=True, use_container_width=True)
                 else:
-                    if st.button(f"${pts}", key=f"btn_{key}", use_container_width=True):
-                        pick_question(cat, pts)
-                        st.rerun()
+                    st.button(f"${pts}", key=f"btn_{key}", use_container_width=True,
+                              on_click=pick_question, args=(cat, pts))
 
     st.write("")
+    server = get_buzzer()
+    if server is not None:
+        players = server.players(room.code)
+        st.caption(f"📱 Buzzers: room **{room.code}** on {buzzer.BUZZER_ADDRESS}"
+                   + (f" — joined: {', '.join(players)}" if players else ""))
+    elif st.session_state.buzzer_error:
+        st.warning(f"📱 Buzzers unavailable on {buzzer.BUZZER_ADDRESS}: {st.session_state.buzzer_error}")
     st.divider()
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("🏁 End Game", use_container_width=True):
-            st.session_state.screen = "final"
-            st.session_state.play_sfx = "victory"
-            st.rerun()
+        st.button("🏁 End Game", use_container_width=True, on_click=end_game)
     with col2:
-        if st.button("🔄 New Game", use_container_width=True):
-            reset_to_start()
-            st.rerun()
+        st.button("🔄 New Game", use_container_width=True, on_click=reset_to_start)
 
-def show_question():
-    q = st.session_state.current_q
-    cat = st.session_state.current_cat
-    pts = st.session_state.current_pts
+def toggle_answer():
+    # Showing the answer pauses the clock; hiding it resumes.
+    room = get_room()
+    if room.paused:
+        room.resume()
+    else:
+        room.pause()
+
+def show_timer():
+    room = get_room()
+    pending = st.session_state.pending_award
+    question_timer(
+        limit=QUESTION_TIME_LIMIT,
+        question=st.session_state.question_seq,
+        paused=room.paused,
+        request=pending["request"] if pending else None,
+        on_change=timer_replied,
+    )
+
+    if room.time_remaining() <= 0:
+        st.warning("Time's up! Skip or award points manually.")
 
-    st.markdown('<h1 class="main-title">🎯 JEOPARDY</h1>', unsafe_allow_html=True)
-    st.write("")
-    show_scoreboard()
-    st.write("")
+def show_answer_controls():
+    room = get_room()
+    q = room.question
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.button("👁️ Show Answer" if not room.paused else "🙈 Hide Answer",
+                  use_container_width=True, on_click=toggle_answer)
 
-    frozen_at = st.session_state.get("timer_frozen_at")
-    if frozen_at:
-        elapsed = frozen_at - st.session_state.question_start_time
-        remaining = max(0, QUESTION_TIME_LIMIT - elapsed)
-    else:
-        remaining = get_time_remaining(st.session_state.question_start_time)
-    time_up = remaining <= 0
-    frozen = "true" if frozen_at else "false"
+        if room.paused:
+            st.success(f"**Answer:** {q['answer']}")
+
+@st.fragment(run_every=BUZZ_POLL_INTERVAL)
+def show_buzz_queue():
+    # Polls the in-process buzzer server; only this small fragment reruns.
+    order = get_buzzer().buzz_order(st.session_state.room_code,
+                                           st.session_state.question_seq)
+    if not order:
+        st.caption("🔔 Waiting for buzzes...")
+        return
+    parts = [f"**{order[0][0]}**"] + [f"{p} (+{offset:.2f}s)" for p, offset in order[1:]]
+    st.markdown("🔔 Buzz order: " + " → ".join(parts))
+
+@metrics.timed("screen.show_question")
+def show_question():
+    room = get_room()
+    cat, pts = room.cell_info(room.current)
+    q = room.question
 
     st.markdown(f"""
         <div style="background: #2a2a3e; border-radius: 16px; padding: 30px; border: 2px solid #7c3aed; margin: 20px 0;">
@@ -366,104 +461,96 @@ def show_question():
         </div>
     """, unsafe_allow_html=True)
 
-    import streamlit.components.v1 as components
-    components.html(f"""
-        <div id="timer-container" style="text-align: center; font-family: sans-serif;">
-            <div style="background: #374151; border-radius: 10px; height: 14px; overflow: hidden; margin: 0 20px;">
-                <div id="timer-bar" style="height: 100%; width: 100%; border-radius: 10px; transition: width 0.1s linear;"></div>
-            </div>
-            <p id="timer-text" style="font-size: 1.8rem; font-weight: bold; margin-top: 10px;"></p>
-            <p id="bonus-text" style="color: #9ca3af; font-size: 0.85rem; margin-top: 4px;"></p>
-        </div>
-        <script>
-            var frozen = {frozen};
-            var remainSec = {remaining};
-            var endTime = Date.now() + remainSec * 1000;
-            var total = {QUESTION_TIME_LIMIT} * 1000;
-            function updateTimer() {{
-                var left = frozen ? remainSec * 1000 : Math.max(0, endTime - Date.now());
-                var pct = (left / total) * 100;
-                var secs = Math.ceil(left / 1000);
-                var bar = document.getElementById('timer-bar');
-                var txt = document.getElementById('timer-text');
-                var bonus = document.getElementById('bonus-text');
-                var color = secs > 20 ? '#4ade80' : secs > 10 ? '#fbbf24' : '#f87171';
-                bar.style.width = pct + '%';
-                bar.style.background = color;
-                txt.style.color = color;
-                if (frozen) {{
-                    txt.innerText = secs + 's (paused)';
-                }} else {{
-                    txt.innerText = left <= 0 ? 'TIME UP!' : secs + 's';
-                }}
-                if (left <= 0) {{
-                    bonus.innerText = '';
-                    txt.style.color = '#f87171';
-                }} else if (secs > 20) {{
-                    bonus.innerText = '1.5x bonus active';
-                }} else if (secs > 10) {{
-                    bonus.innerText = '1.0x normal points';
-                }} else {{
-                    bonus.innerText = '0.5x slow penalty';
-                }}
-                if (!frozen && left > 0) requestAnimationFrame(updateTimer);
-            }}
-            updateTimer();
-        </script>
-    """, height=130)
-
-    if time_up:
-        st.warning("Time's up! Skip or award points manually.")
-
-    # Show/hide answer toggle
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        if st.button("👁️ Show Answer" if not st.session_state.show_answer else "🙈 Hide Answer", use_container_width=True):
-            st.session_state.show_answer = not st.session_state.show_answer
-            if st.session_state.show_answer and st.session_state.get("timer_frozen_at") is None:
-                st.session_state.timer_frozen_at = time.time()
-            elif not st.session_state.show_answer and st.session_state.get("timer_frozen_at"):
-                paused_duration = time.time() - st.session_state.timer_frozen_at
-                st.session_state.question_start_time += paused_duration
-                st.session_state.timer_frozen_at = None
-            st.rerun()
-
-        if st.session_state.show_answer:
-            st.success(f"**Answer:** {q['answer']}")
+    show_timer()
+    if get_buzzer() is not None:
+        show_buzz_queue()
+    show_answer_controls()
 
     st.write("")
     st.divider()
     st.markdown("### 🎉 Who got it right?")
     st.caption("Click the player who answered correctly, or mark wrong/skip")
 
+    # Further awards wait until the pending one is in.
+    pending = st.session_state.pending_award is not None
+    if pending:
+        st.caption("⏱️ Locking in answer time...")
+
     # Player buttons
-    players = st.session_state.players
+    players = room.players
     cols = st.columns(len(players))
     for i, player in enumerate(players):
         with cols[i]:
-            if st.button(f"✅ {player}", key=f"correct_{player}", use_container_width=True):
-                award_points(player, True)
-                st.rerun()
+            st.button(f"✅ {player}", key=f"correct_{player}", use_container_width=True,
+                      on_click=request_award, args=(i,), disabled=pending)
 
     st.write("")
     st.markdown("### ❌ Who got it wrong?")
     cols2 = st.columns(len(players))
     for i, player in enumerate(players):
         with cols2[i]:
-            if st.button(f"❌ {player}", key=f"wrong_{player}", use_container_width=True, type="secondary"):
-                award_points(player, False)
-                st.rerun()
+            st.button(f"❌ {player}", key=f"wrong_{player}", use_container_width=True, type="secondary",
+                      on_click=award_points, args=(i, False), disabled=pending)
 
     st.write("")
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("⏭️ Skip (nobody answered)", use_container_width=True):
-            skip_question()
-            st.rerun()
+        st.button("⏭️ Skip (nobody answered)", use_container_width=True, on_click=skip_question,
+                  disabled=pending)
+
+@fragment(key=GAME_FRAGMENT)
+def show_game(sfx_slot):
+    # Board and question screens. Buttons in here change state through
+    # on_click callbacks, which run before the fragment reruns, so a click
+    # costs one fragment run instead of two full script runs. Sounds go to
+    # sfx_slot, which main() claims above the page, so they don't need a
+    # full run either. Leaving the game (end, new game, last cell) needs the
+    # rest of the page, so it escalates to a full rerun.
+    resolve_pending_award()
+    if st.session_state.pending_award is not None:
+        show_game_waiting()
+    else:
+        draw_game(sfx_slot)
+
+@st.fragment(run_every=AWARD_POLL_INTERVAL)
+def show_game_waiting():
+    # The same screen while an award waits for the timer's reply. The reply
+    # reruns show_game through timer_replied(); polling covers the
+    # TIMER_REPLY_TIMEOUT fallback, resolving the award and redrawing the
+    # scoreboard and board right here. Streamlit won't let a nested fragment
+    # that first appears in its parent's rerun write to sfx_slot, so that
+    # sound plays inline. The next pick reruns show_game, which drops this
+    # view and its polling. With QUIZ_FRAGMENTS=0 there is no show_game to
+    # rerun, so a resolved award goes back to a full run.
+    resolve_pending_award()
+    if not USE_FRAGMENTS and st.session_state.pending_award is None:
+        st.rerun()
+    draw_game(None)
+
+def draw_game(sfx_slot):
+    screen = current_screen()
+    if screen not in GAME_SCREENS:
+        st.rerun()
+    runs = st.session_state.setdefault("metrics_runs", [])
+    with metrics.collect(runs), rerun_stats.measure("fragment"), metrics.phase("app.fragment"):
+        if sfx_slot is None:
+            if st.session_state.play_sfx:
+                play_effect(st.session_state.play_sfx)
+            st.session_state.play_sfx = None
+        else:
+            play_pending_sound(sfx_slot)
+        show_scoreboard()
+        st.write("")
+        if screen == "board":
+            st.divider()
+            show_board()
+        else:
+            show_question()
 
+@metrics.timed("screen.show_final")
 def show_final():
-    scores = st.session_state.scores
-    ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    room = get_room()
+    ranked = room.standings()
     winner = ranked[0]
 
     st.balloons()
@@ -504,29 +591,59 @@ def show_final():
     st.write("")
     st.divider()
 
+    show_reaction_times(room)
+
     with st.expander("📜 Round History"):
-        for h in st.session_state.history:
-            if h["player"] == "Nobody":
-                st.info(f"⏭️ **{h['category'].title()} ${abs(h['earned']) if h['earned'] != 0 else st.session_state.current_pts}** — Skipped")
-            elif h["correct"]:
-                bonus_tag = f" ({h['bonus']}x)" if h.get("bonus") and h["bonus"] != 1.0 else ""
-                st.success(f"✅ **{h['player']}** — {h['category'].title()} +${h['earned']}{bonus_tag}")
+        for turn in room.history:
+            cat, pts = room.cell_info(turn.cell)
+            if turn.player == engine.NOBODY:
+                st.info(f"⏭️ **{cat.title()} ${pts}** — Skipped")
+            elif turn.correct:
+                bonus_tag = f" ({turn.bonus}x)" if turn.bonus and turn.bonus != 1.0 else ""
+                st.success(f"✅ **{room.players[turn.player]}** — {cat.title()} +${turn.earned}{bonus_tag}")
             else:
-                st.error(f"❌ **{h['player']}** — {h['category'].title()} -${abs(h['earned'])}")
+                st.error(f"❌ **{room.players[turn.player]}** — {cat.title()} -${abs(turn.earned)}")
 
     st.write("")
     col1, col2 = st.columns(2)
     with col1:
         if st.button("💾 Save Scores", type="primary", use_container_width=True):
-            total = sum(POINT_VALUES) * len(get_categories())
-            for player, score in scores.items():
-                save_score(player, score, total, "jeopardy")
-            st.success("Scores saved! 🎉")
+            st.session_state.save_handle = save_scores(
+                [(player, score, room.max_score, "jeopardy") for player, score in ranked]
+            )
+            reaction_times.get_store().record_many(room.answer_times())
+        handle = st.session_state.save_handle
+        if handle is not None:
+            if handle.wait(timeout=2):
+                st.success("Scores saved! 🎉")
+            elif handle.error is not None:
+                st.error(f"Couldn't save scores: {handle.error}")
+            else:
+                st.info("Saving scores... ⏳")
     with col2:
         if st.button("🔄 Play Again", use_container_width=True):
             reset_to_start()
             st.rerun()
 
+def show_reaction_times(room):
+    game = {}
+    for player, _, _, seconds in room.answer_times():
+        game.setdefault(player, reaction_times.LatencyHistogram()).add(seconds)
+    if not game:
+        return
+    with st.expander("⏱️ Answer Speed"):
+        store = reaction_times.get_store()
+        for player in room.players:
+            hist = game.get(player)
+            if hist is None:
+                continue
+            line = (f"**{player}** — median {hist.percentile(0.5):.1f}s over {hist.count} answers,"
+                    f" slowest 10% past {hist.percentile(0.9):.1f}s")
+            past = store.summary(player)
+            if past:
+                line += f" · all-time median {past['median']:.1f}s"
+            st.write(line)
+
 def show_leaderboard():
     scores = get_top_scores(10)
     if not scores:
@@ -543,29 +660,43 @@ def show_leaderboard():
                 medal = f"#{i}"
             st.write(f"{medal} **{s['name']}** — ${s['score']}")
 
-def play_pending_sound():
+@metrics.timed("app.play_pending_sound")
+def play_pending_sound(slot):
     sfx = st.session_state.get("play_sfx")
-    if sfx == "correct":
-        play_sound(generate_correct_sound())
-    elif sfx == "wrong":
-        play_sound(generate_wrong_sound())
-    elif sfx == "select":
-        play_sound(generate_select_sound())
-    elif sfx == "victory":
-        play_sound(generate_victory_sound())
+    with slot:
+        if SFX_DELIVERY == "sprite":
+            if sfx:
+                st.session_state.sfx_event_id += 1
+            sfx_player(sfx, st.session_state.sfx_event_id)
+        elif sfx:
+            play_effect(sfx)
     st.session_state.play_sfx = None
 
+# Outside the game the slot is filled through a fragment too, so the player
+# sits in the same kind of wrapper on every screen and keeps its iframe.
+play_sounds = fragment(play_pending_sound)
+
 def main():
-    init_state()
-    play_pending_sound()
-    screen = st.session_state.screen
-    if screen == "start":
-        show_start()
-    elif screen == "board":
-        show_board()
-    elif screen == "question":
-        show_question()
-    elif screen == "final":
-        show_final()
+    metrics.start_exporters()
+    runs = st.session_state.setdefault("metrics_runs", [])
+    with metrics.collect(runs), rerun_stats.measure("app"), metrics.phase("app.run"):
+        with metrics.phase("app.init_state"):
+            init_state()
+        # Claimed first on every screen and filled by whichever part of the
+        # page is running, so the player's iframe is never recreated.
+        sfx_slot = st.empty()
+        screen = current_screen()
+        if screen in GAME_SCREENS:
+            st.markdown('<h1 class="main-title">🎯 JEOPARDY</h1>', unsafe_allow_html=True)
+            st.write("")
+            show_game(sfx_slot)
+        else:
+            play_sounds(sfx_slot)
+            if screen == "start":
+                show_start()
+            elif screen == "final":
+                show_final()
+    rerun_stats.show_panel()
+    metrics.show_panel(runs)
 
 main()
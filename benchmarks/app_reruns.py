@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import time
+
+# Plays a scripted 6-player game through Streamlit's AppTest harness with
+# QUIZ_RERUN_STATS=1 and reports server time and delta messages per run.
+# AppTest always executes the whole script, so the "fragment" row is the
+# part of each full run that a browser fragment rerun would execute on its
+# own. Before fragments every click cost two full runs: one to handle the
+# click and one from the st.rerun() that followed it.
+
+os.environ["QUIZ_RERUN_STATS"] = "1"
+
+PLAYERS = 6
+QUESTIONS = 10
+
+def find(at, label):
+    return next(b for b in at.button if b.label == label)
+
+def timed_click(at, button):
+    start = time.perf_counter()
+    button.click().run()
+    return time.perf_counter() - start
+
+def reply_from_timer(at):
+    # AppTest has no browser, so answer the timer component's elapsed-time
+    # request the way the real component would.
+    pending = at.session_state.pending_award
+    if pending is not None:
+        at.session_state["question_timer"] = {
+            "request": pending["request"],
+            "question": at.session_state.question_seq,
+            "elapsed": 4.2,
+        }
+        at.run()
+
+def play():
+    from streamlit.testing.v1 import AppTest
+    app = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+    at = AppTest.from_file(app, default_timeout=60)
+    at.run()
+    at.selectbox[0].select(PLAYERS).run()
+    find(at, "🚀 START GAME").click().run()
+    interactions = []
+    for n in range(QUESTIONS):
+        cell = next(b for b in at.button if b.label.startswith("$") and not b.disabled)
+        interactions.append(("pick", timed_click(at, cell)))
+        interactions.append(("show answer", timed_click(at, find(at, "👁️ Show Answer"))))
+        player = f"Player {n % PLAYERS + 1}"
+        interactions.append(("award", timed_click(at, find(at, f"✅ {player}"))))
+        reply_from_timer(at)
+    return interactions, at.session_state["rerun_stats"]
+
+def main():
+    import rerun_stats
+    from benchmarks.synthetic import use_data_dir
+    with tempfile.TemporaryDirectory() as tmp:
+        use_data_dir(tmp)
+        interactions, runs = play()
+    by_action = {}
+    for action, elapsed in interactions:
+        by_action.setdefault(action, []).append(elapsed)
+    print(f"{PLAYERS} players, {QUESTIONS} questions")
+    for action, times in by_action.items():
+        print(f"  {action:>12}: {sum(times) / len(times) * 1000:7.1f} ms per click (AppTest round trip)")
+    for kind, s in rerun_stats.summary(runs).items():
+        print(f"  {kind:>12}: {s['runs']} runs, {s['avg_ms']:.1f} ms server time,"
+              f" {s['avg_deltas']:.0f} deltas avg")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Plays a scripted game against a real `streamlit run` server over its
+# websocket, sending what the browser frontend sends: button triggers and
+# component values scoped to the fragment that rendered them, and the
+# auto-rerun requests of run_every fragments. Unlike app_reruns.py (AppTest,
+# which always runs the whole script) this shows which clicks cost a
+# fragment run and which fall through to a full run. It does not render
+# anything, so iframe and audio behaviour still need a browser.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUESTIONS = 10
+# How long the server must stay quiet before a click counts as settled.
+QUIET = 0.3
+
+_SERVER_SCRIPT = """
+import os, shutil, sys
+sys.path.insert(0, os.getcwd())
+from benchmarks.synthetic import use_data_dir, use_question_dir
+tmp, port = sys.argv[1], int(sys.argv[2])
+use_data_dir(tmp)
+os.makedirs(os.path.join(tmp, "questions"))
+shutil.copy(os.path.join("data", "questions.json"), os.path.join(tmp, "questions"))
+use_question_dir(os.path.join(tmp, "questions"))
+from streamlit import config
+for name, value in (("server.headless", True), ("server.port", port),
+                    ("server.enableXsrfProtection", False), ("server.enableCORS", False),
+                    ("browser.gatherUsageStats", False)):
+    config.set_option(name, value)
+from streamlit.web import bootstrap
+bootstrap.run("app.py", False, [], {})
+"""
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+class Session:
+    # Tracks the rendered elements by delta path, like the frontend's tree,
+    # and the fragment each one belongs to.
+
+    def __init__(self, port):
+        from websockets.sync.client import connect
+        for _ in range(100):
+            try:
+                self.ws = connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"])
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("streamlit server did not start")
+        self.elements = {}
+        self.auto_reruns = {}
+        self.errors = []
+
+    def send(self, widgets=(), fragment_id="", auto=False):
+        from streamlit.proto import BackMsg_pb2
+        msg = BackMsg_pb2.BackMsg()
+        state = msg.rerun_script
+        state.query_string = ""
+        state.page_script_hash = ""
+        state.fragment_id = fragment_id
+        state.is_auto_rerun = auto
+        state.widget_states.widgets.extend(widgets)
+        self.ws.send(msg.SerializeToString())
+
+    def settle(self, until=None):
+        # Reads until no run is in progress and the server has been quiet for
+        # QUIET seconds (and at least until `until`), firing auto-reruns that
+        # come due meanwhile. Returns (full runs, fragment runs, bytes); runs
+        # preempted before they drew anything (e.g. by a callback's st.rerun)
+        # don't count.
+        from streamlit.proto import ForwardMsg_pb2
+        full = fragments = size = 0
+        running = False
+        is_fragment = False
+        last = time.perf_counter()
+        due = {fid: last + every for fid, every in self.auto_reruns.items()}
+        while True:
+            now = time.perf_counter()
+            if not running and now - last >= QUIET and (until is None or now >= until):
+                return full, fragments, size
+            for fid, at in list(due.items()):
+                if now >= at and fid in self.auto_reruns:
+                    self.send(fragment_id=fid, auto=True)
+                    due[fid] = at + self.auto_reruns[fid]
+            try:
+                raw = self.ws.recv(timeout=0.05)
+            except TimeoutError:
+                continue
+            last = time.perf_counter()
+            size += len(raw)
+            msg = ForwardMsg_pb2.ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                running = True
+                ids = set(msg.new_session.fragment_ids_this_run)
+                is_fragment = bool(ids)
+                if ids:
+                    self.elements = {p: e for p, e in self.elements.items() if e[2] not in ids}
+                else:
+                    self.elements = {}
+                    self.auto_reruns = {}
+                    due = {}
+            elif kind == "script_finished":
+                running = False
+                if msg.script_finished != ForwardMsg_pb2.ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    if is_fragment:
+                        fragments += 1
+                    else:
+                        full += 1
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                path = tuple(msg.metadata.delta_path)
+                self.elements[path] = (element.WhichOneof("type"), element, msg.delta.fragment_id)
+                if element.WhichOneof("type") == "exception":
+                    self.errors.append(f"{element.exception.type}: {element.exception.message}")
+            elif kind == "auto_rerun":
+                self.auto_reruns[msg.auto_rerun.fragment_id] = msg.auto_rerun.interval
+                due[msg.auto_rerun.fragment_id] = last + msg.auto_rerun.interval
+            elif kind == "stop_auto_rerun":
+                for fid in msg.stop_auto_rerun.fragment_ids:
+                    self.auto_reruns.pop(fid, None)
+                    due.pop(fid, None)
+
+    def find(self, kind, match):
+        for path in sorted(self.elements):
+            k, element, fid = self.elements[path]
+            if k == kind and match(getattr(element, kind)):
+                return getattr(element, kind), fid
+        raise LookupError(kind)
+
+    def click(self, match):
+        from streamlit.proto import WidgetStates_pb2
+        button, fid = self.find("button", lambda b: not b.disabled and match(b.label))
+        self.send([WidgetStates_pb2.WidgetState(id=button.id, trigger_value=True)], fid)
+
+    def reply(self, component, value):
+        from streamlit.proto import WidgetStates_pb2
+        instance, fid = self.find("component_instance", lambda c: c.component_name.endswith(component))
+        self.send([WidgetStates_pb2.WidgetState(id=instance.id, json_value=json.dumps(value))], fid)
+
+    def timer_request(self):
+        instance, _ = self.find("component_instance", lambda c: c.component_name.endswith("question_timer"))
+        return json.loads(instance.json_args)
+
+def play(session):
+    results = []
+
+    def step(action, until=None):
+        start = time.perf_counter()
+        full, fragments, size = session.settle(until)
+        results.append((action, full, fragments, size, time.perf_counter() - start))
+
+    session.send()
+    step("load")
+    session.click(lambda label: label == "🚀 START GAME")
+    step("start")
+    for n in range(QUESTIONS):
+        session.click(lambda label: label.startswith("$"))
+        step("pick")
+        session.click(lambda label: label == "👁️ Show Answer")
+        step("show answer")
+        session.click(lambda label: label == f"✅ Player {n % 2 + 1}")
+        step("award")
+        args = session.timer_request()
+        if n == QUESTIONS - 1:
+            # The timer never replies: the award resolves on its own after
+            # the fallback timeout.
+            step("award (no reply)", until=time.perf_counter() + 4.0)
+        else:
+            session.reply("question_timer", {"request": args["request"], "question": args["question"],
+                                             "elapsed": 4.2})
+            step("timer reply")
+    return results
+
+def main():
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        server = subprocess.Popen([sys.executable, "-c", _SERVER_SCRIPT, tmp, str(port)], cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            session = Session(port)
+            results = play(session)
+        finally:
+            server.terminate()
+            server.wait()
+    by_action = {}
+    for action, full, fragments, size, elapsed in results:
+        by_action.setdefault(action, []).append((full, fragments, size, elapsed))
+    print(f"2 players, {QUESTIONS} questions, real server over websocket")
+    for action, rows in by_action.items():
+        n = len(rows)
+        print(f"  {action:>17}: {sum(r[0] for r in rows) / n:.1f} full + {sum(r[1] for r in rows) / n:.1f} fragment"
+              f" runs, {sum(r[2] for r in rows) / n / 1024:.1f} KB, settled in"
+              f" {sum(r[3] for r in rows) / n * 1000 - QUIET * 1000:.0f} ms")
+    for error in session.errors:
+        print(f"  error: {error}")
+    return 1 if session.errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
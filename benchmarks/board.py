@@ -0,0 +1,25 @@
+import time
+from questions import QuestionBank, build_board
+from benchmarks.synthetic import make_bank
+
+SIZES = [25, 250, 2_500, 25_000, 100_000]
+REPEAT = 2_000
+
+def time_board(bank, repeat=REPEAT):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build_board(bank)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    print(f"{'per category':>14} {'index build':>12} {'build_board':>12}")
+    for size in SIZES:
+        data = make_bank(size)
+        start = time.perf_counter()
+        bank = QuestionBank(data)
+        load = time.perf_counter() - start
+        per_board = time_board(bank)
+        print(f"{size:>14,} {load * 1e3:>10.1f}ms {per_board * 1e6:>10.1f}us")
+
+if __name__ == "__main__":
+    main()
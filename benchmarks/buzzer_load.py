@@ -0,0 +1,95 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from buzzer import BuzzerServer
+
+ROOMS = 50
+PLAYERS = 6
+QUESTIONS = 20
+MAX_BUZZ_DELAY = 0.05
+
+class LoadClient:
+
+    def __init__(self, room, player, rng):
+        self.room = room
+        self.player = player
+        self.rng = rng
+        self.buzzed_at = None
+        self.latencies = []
+        self.opened = asyncio.Event()
+
+    async def run(self, port, joined):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        self.writer = writer
+        self._send({"type": "join", "room": self.room, "player": self.player})
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            msg = json.loads(line)
+            kind = msg["type"]
+            if kind == "ping":
+                self._send({"type": "pong", "id": msg["id"]})
+            elif kind == "joined":
+                joined.release()
+            elif kind == "open":
+                self.buzzed_at = None
+                asyncio.get_running_loop().call_later(
+                    self.rng.uniform(0, MAX_BUZZ_DELAY), self._buzz)
+            elif kind == "locked" and self.buzzed_at is not None and self.player in msg["order"]:
+                self.latencies.append(time.perf_counter() - self.buzzed_at)
+                self.buzzed_at = None
+
+    def _send(self, msg):
+        self.writer.write(json.dumps(msg).encode() + b"\n")
+
+    def _buzz(self):
+        self.buzzed_at = time.perf_counter()
+        self._send({"type": "buzz"})
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+async def run(rooms, players, questions):
+    server = BuzzerServer()
+    port = await server.start("127.0.0.1", 0)
+    rng = random.Random(0)
+    joined = asyncio.Semaphore(0)
+    clients = [LoadClient(f"R{r:03d}", f"p{i}", rng) for r in range(rooms) for i in range(players)]
+    tasks = [asyncio.ensure_future(c.run(port, joined)) for c in clients]
+    for _ in clients:
+        await joined.acquire()
+
+    start = time.perf_counter()
+    for q in range(1, questions + 1):
+        for r in range(rooms):
+            server.room(f"R{r:03d}").open(q)
+        # Long enough for every buzz to land and every room to lock.
+        await asyncio.sleep(MAX_BUZZ_DELAY + 0.3)
+    elapsed = time.perf_counter() - start
+
+    for c in clients:
+        c.writer.close()
+    await asyncio.gather(*tasks)
+    # Let the server see the disconnects before the loop shuts down.
+    await asyncio.sleep(0.1)
+    server.stop()
+    return [l for c in clients for l in c.latencies], elapsed
+
+def main():
+    latencies, elapsed = asyncio.run(run(ROOMS, PLAYERS, QUESTIONS))
+    expected = ROOMS * PLAYERS * QUESTIONS
+    print(f"{ROOMS} rooms x {PLAYERS} players, {QUESTIONS} questions: "
+          f"{len(latencies)}/{expected} buzzes locked in {elapsed:.1f}s")
+    if not latencies:
+        return 1
+    print(f"buzz-to-lock latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms,"
+          f" p99 {percentile(latencies, 0.99) * 1000:.1f} ms,"
+          f" max {max(latencies) * 1000:.1f} ms")
+    return 0 if len(latencies) == expected else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+from benchmarks.synthetic import CATEGORIES, POINT_VALUES, make_question
+
+# Imports a synthetic JSON Lines file into a synthetic bank and reports
+# rows/s and the importer's peak memory. About 2% of rows are exact
+# duplicates (reworded only in case and punctuation) and 1% are invalid.
+
+ROWS = 1_000_000
+BANK = 10_000
+
+def write_source(path, rows, seed=0):
+    rng = random.Random(seed)
+    previous = None
+    with open(path, "w") as f:
+        for n in range(rows):
+            cat = CATEGORIES[n % len(CATEGORIES)]
+            q = make_question(rng, cat, POINT_VALUES[n % len(POINT_VALUES)], BANK + n)
+            r = rng.random()
+            if r < 0.02 and previous:
+                cat, q = previous
+                q = dict(q, question=q["question"].upper().replace("?", " ?"))
+            elif r < 0.03:
+                q["answer"] = "none of these"
+            previous = cat, q
+            f.write(json.dumps({"category": cat, **q}) + "\n")
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.question_import")
+    parser.add_argument("--rows", type=int, default=ROWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--near", type=float, default=None)
+    args = parser.parse_args(argv[1:])
+
+    from benchmarks.synthetic import make_bank
+    from question_import import import_questions
+    with tempfile.TemporaryDirectory() as tmp:
+        bank = os.path.join(tmp, "questions.json")
+        source = os.path.join(tmp, "import.jsonl")
+        with open(bank, "w") as f:
+            json.dump(make_bank(BANK // len(CATEGORIES)), f)
+        write_source(source, args.rows)
+        print(f"source: {os.path.getsize(source) / 1e6:.0f} MB, {args.rows:,} rows, {args.workers} workers")
+        import_questions([source], bank, args.near, args.workers)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak memory: {peak:.0f} MB (importer process)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,67 @@
+import random
+import sys
+import time
+import tracemalloc
+from engine import RoomRegistry
+from benchmarks.synthetic import CATEGORIES, POINT_VALUES, make_question
+
+ROOMS = 1000
+PLAYERS = 4
+# Seconds between actions in a real game (pick, answer, award...).
+HUMAN_PACE = 5.0
+
+def make_board(rng):
+    return {cat: {pts: make_question(rng, cat, pts, 0) for pts in POINT_VALUES} for cat in CATEGORIES}
+
+def play(rooms, rng):
+    # Round-robin over the rooms, one action per room per pass, until every
+    # game is over. Returns the number of actions taken.
+    actions = 0
+    live = list(rooms)
+    now = 0.0
+    while live:
+        still = []
+        for room in live:
+            now += 0.001
+            if room.current is None:
+                free = [c for c in range(room.cell_count) if not room.used >> c & 1]
+                room.pick(*room.cell_info(rng.choice(free)), now=now)
+            elif rng.random() < 0.1:
+                room.skip()
+            else:
+                room.award(rng.randrange(len(room.players)), rng.random() < 0.7, now=now + 5)
+            actions += 1
+            if not room.finished:
+                still.append(room)
+        live = still
+    return actions
+
+def main():
+    rng = random.Random(0)
+    # One board shared by every room, as boards are only read.
+    board = make_board(rng)
+    players = [f"Player {i + 1}" for i in range(PLAYERS)]
+
+    tracemalloc.start()
+    registry = RoomRegistry()
+    rooms = [registry.create(players, board, POINT_VALUES) for _ in range(ROOMS)]
+    per_room = tracemalloc.get_traced_memory()[0] / ROOMS
+    play(rooms, rng)
+    finished = tracemalloc.get_traced_memory()[0] / ROOMS
+    tracemalloc.stop()
+
+    registry = RoomRegistry()
+    rooms = [registry.create(players, board, POINT_VALUES) for _ in range(ROOMS)]
+    start = time.perf_counter()
+    actions = play(rooms, rng)
+    elapsed = time.perf_counter() - start
+    rate = actions / elapsed
+
+    print(f"{ROOMS} rooms, {PLAYERS} players, {rooms[0].cell_count} cells each")
+    print(f"  {actions:,} actions in {elapsed:.2f}s: {rate:,.0f} actions/s on one core")
+    print(f"  that is {rate * HUMAN_PACE:,.0f} live rooms at one action every {HUMAN_PACE:.0f}s each")
+    print(f"  {per_room:,.0f} bytes per new room, {finished:,.0f} bytes per finished room")
+    return 0 if all(r.finished for r in rooms) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
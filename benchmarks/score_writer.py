@@ -0,0 +1,57 @@
+import sys
+import tempfile
+import threading
+import time
+import scoring
+from benchmarks.synthetic import use_data_dir
+
+THREADS = 32
+SAVES_PER_THREAD = 50
+
+def run(threads, saves_per_thread, batched):
+    errors = []
+
+    def worker(t):
+        handles = []
+        for i in range(saves_per_thread):
+            entry = (f"t{t}-{i}", i, 100, "jeopardy")
+            if batched:
+                handles.append(scoring.save_scores([entry]))
+            else:
+                scoring._save_entries([scoring.make_entry(*entry)])
+        for h in handles:
+            if not h.wait(60):
+                errors.append(h.error)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start, errors
+
+def check(threads, saves_per_thread):
+    saved = {s["name"] for s in scoring.load_scores()}
+    expected = {f"t{t}-{i}" for t in range(threads) for i in range(saves_per_thread)}
+    missing = expected - saved
+    problems = scoring.check_leaderboard() + scoring.check_player_index()
+    return missing, problems
+
+def main():
+    total = THREADS * SAVES_PER_THREAD
+    ok = True
+    for label, batched in (("one write per save", False), ("group commit", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            use_data_dir(tmp)
+            elapsed, errors = run(THREADS, SAVES_PER_THREAD, batched)
+            missing, problems = check(THREADS, SAVES_PER_THREAD)
+            print(f"{label:>20}: {total} saves from {THREADS} threads in {elapsed:.2f}s"
+                  f" ({total / elapsed:,.0f} saves/s), lost {len(missing)}, errors {len(errors)}")
+            for p in problems:
+                print(f"{'':>22}{p}")
+            ok = ok and not missing and not errors and not problems
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import io
+import math
+import struct
+import sys
+import time
+import wave
+import sounds
+
+# The per-sample implementation sounds.py used before tone_pcm(), kept here
+# as the baseline for timing and for checking the output still matches.
+
+def legacy_tone(frequency, duration, volume=0.5, sample_rate=22050):
+    n_samples = int(sample_rate * duration)
+    samples = []
+    for i in range(n_samples):
+        t = i / sample_rate
+        fade = 1.0
+        if i > n_samples * 0.7:
+            fade = (n_samples - i) / (n_samples * 0.3)
+        value = volume * fade * math.sin(2 * math.pi * frequency * t)
+        samples.append(int(value * 32767))
+
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        for s in samples:
+            wf.writeframes(struct.pack('<h', s))
+    return buf.getvalue()
+
+def legacy_sequence(notes):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(22050)
+        for args in notes:
+            with wave.open(io.BytesIO(legacy_tone(*args)), 'rb') as rf:
+                wf.writeframes(rf.readframes(rf.getnframes()))
+    return buf.getvalue()
+
+LEGACY = {
+    "select": lambda: legacy_tone(440, 0.1, 0.3),
+    "correct": lambda: legacy_sequence([(523, 0.15, 0.4), (659, 0.15, 0.4), (784, 0.25, 0.4)]),
+    "wrong": lambda: legacy_sequence([(200, 0.3, 0.4), (150, 0.4, 0.3)]),
+    "victory": lambda: legacy_sequence([(n, 0.2, 0.4) for n in (523, 659, 784, 1047)]),
+}
+
+CURRENT = {
+    "select": sounds.generate_select_sound,
+    "correct": sounds.generate_correct_sound,
+    "wrong": sounds.generate_wrong_sound,
+    "victory": sounds.generate_victory_sound,
+}
+
+def frames(wav):
+    with wave.open(io.BytesIO(wav), 'rb') as rf:
+        data = rf.readframes(rf.getnframes())
+    return struct.unpack(f"<{len(data) // 2}h", data)
+
+def max_diff(a, b):
+    fa, fb = frames(a), frames(b)
+    if len(fa) != len(fb):
+        return None
+    return max((abs(x - y) for x, y in zip(fa, fb)), default=0)
+
+def best_of(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    backend = "numpy" if sounds.np is not None else "array"
+    print(f"tone backend: {backend}")
+    print(f"{'effect':>10} {'legacy':>10} {'current':>10} {'speedup':>8} {'max diff':>9}")
+    ok = True
+    for name, legacy in LEGACY.items():
+        diff = max_diff(legacy(), CURRENT[name]())
+        old = best_of(legacy)
+        new = best_of(CURRENT[name])
+        print(f"{name:>10} {old * 1e3:>8.2f}ms {new * 1e3:>8.2f}ms {old / new:>7.1f}x {diff!s:>9}")
+        ok = ok and diff is not None and diff <= 1
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Startup budget for the CLI. Imports main.py under -X importtime and fails if
+# its cumulative import time is over budget or if anything on the
+# heavyweight list got imported before the menu is shown. Also times the
+# first stream_categories() / stream_questions() calls in a fresh process
+# (the snapshot load) against parsing the JSON source directly, and a full
+# "start, show the menu, quit" run against a bare interpreter.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = 20.0
+# Modules only some menu actions need; none of them should load at startup.
+DEFERRED = ("scoring", "sqlite3", "leaderboard", "player_index", "engine",
+            "question_stream", "json", "streamlit", "numpy")
+RUNS = 5
+# First question calls in a fresh process, snapshot already on disk.
+LOAD_BUDGET_MS = 10.0
+_LOAD_SCRIPT = '''
+import json, time
+import questions
+from questions import stream_categories, stream_questions
+start = time.perf_counter()
+cats = stream_categories()
+stream_questions(cats[0])
+stream_categories()
+first = time.perf_counter() - start
+start = time.perf_counter()
+with open(questions._text_source(), "rb") as f:
+    json.load(f)
+print(first * 1000, (time.perf_counter() - start) * 1000)
+'''
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+def import_times():
+    # {module: cumulative microseconds} for the top-level imports of main.
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    modules = {}
+    for line in out.splitlines():
+        m = _LINE.match(line)
+        if m:
+            modules[m.group(4)] = int(m.group(2))
+    return modules
+
+def timed_run(args, stdin=""):
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=ROOT, input=stdin, capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def load_times():
+    # Best of RUNS fresh processes: (first question calls, json.load) in ms.
+    # An untimed run first builds the snapshot if it's missing.
+    best = None
+    for n in range(RUNS + 1):
+        out = subprocess.run([sys.executable, "-c", _LOAD_SCRIPT], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        times = tuple(map(float, out.split()))
+        if not n:
+            continue
+        best = times if best is None else tuple(map(min, best, times))
+    return best
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.startup")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help="maximum cumulative import time of main.py")
+    parser.add_argument("--load-budget-ms", type=float, default=LOAD_BUDGET_MS,
+                        help="maximum time of the first question calls")
+    args = parser.parse_args(argv[1:])
+
+    sys.path.insert(0, ROOT)
+    from questions import stream_categories
+    quit_choice = len(stream_categories()) + 3
+
+    modules = import_times()
+    main_ms = modules["main"] / 1000
+    deferred = [m for m in DEFERRED if m in modules]
+    print(f"import main: {main_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if deferred:
+        print(f"  imported at startup but should be deferred: {', '.join(deferred)}")
+
+    load_ms, json_ms = load_times()
+    print(f"first stream_categories/stream_questions: {load_ms:.2f} ms"
+          f" (budget {args.load_budget_ms:.0f} ms; json.load of the source {json_ms:.2f} ms)")
+
+    bare = timed_run([sys.executable, "-c", "pass"])
+    cli = timed_run([sys.executable, "main.py"], stdin=f"{quit_choice}\n")
+    print(f"menu and quit: {cli * 1000:.1f} ms, of which interpreter startup {bare * 1000:.1f} ms")
+
+    ok = main_ms <= args.budget_ms and not deferred and load_ms <= args.load_budget_ms
+    print("within budget" if ok else "OVER BUDGET")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.synthetic import (
+    CATEGORIES, make_bank, make_scores, player_name, write_score_snapshot,
+    use_data_dir, use_question_dir,
+)
+
+# Times the hot paths against synthetic data and writes the results as JSON,
+# so a change can be checked against a saved baseline:
+#
+#   python3 -m benchmarks.suite --out baseline.json
+#   ...change something...
+#   python3 -m benchmarks.suite --out new.json --baseline baseline.json
+#   python3 -m benchmarks.suite --compare baseline.json new.json
+#
+# Comparing exits 1 if any case's median got slower by more than --threshold.
+
+SCALES = {
+    # (question bank sizes, score history sizes)
+    "small": ([1_000, 10_000], [1_000, 10_000]),
+    "medium": ([1_000, 10_000, 100_000], [1_000, 100_000, 1_000_000]),
+    "full": ([1_000, 10_000, 100_000, 1_000_000], [1_000, 100_000, 1_000_000, 10_000_000]),
+}
+ROUNDS = 5
+ROUND_TIME = 0.1
+MAX_CALLS = 10_000
+SLOW_CALL = 0.5
+THRESHOLD = 0.2
+
+def measure(func):
+    # Calls func enough times for each of ROUNDS rounds to take about
+    # ROUND_TIME, and returns seconds per call for every round. Anything
+    # slower than SLOW_CALL is timed three times, one call each.
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    if first >= SLOW_CALL:
+        calls, rounds = 1, 3
+    else:
+        calls, rounds = max(1, min(MAX_CALLS, int(ROUND_TIME / max(first, 1e-9)))), ROUNDS
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        times.append((time.perf_counter() - start) / calls)
+    return times, calls
+
+def question_cases(size, tmp):
+    import questions
+    use_question_dir(tmp)
+    with open(questions.DATA_FILE, "w") as f:
+        json.dump(make_bank(size // len(CATEGORIES)), f)
+
+    def load_questions():
+        # As a fresh process would: nothing cached in memory, but the
+        # snapshot the first call wrote is still on disk.
+        questions._loaded = (None, None, None)
+        questions._bank = None
+        questions._bank_stamp = None
+        return questions.load_questions()
+
+    yield "load_questions", load_questions
+    questions.get_bank()
+    yield "get_questions", lambda: questions.get_questions(CATEGORIES[0])
+    yield "build_board", questions.build_board
+    import question_stats
+    selector = question_stats.Selector(questions.get_bank(),
+                                       question_stats.StatsStore(os.path.join(tmp, "question_stats.db")))
+    yield "build_board(adaptive)", lambda: questions.build_board(selector=selector)
+
+def score_cases(size, tmp, backend):
+    import scoring
+    use_data_dir(tmp)
+    scoring.SCORE_BACKEND = backend
+    if backend == "json":
+        write_score_snapshot(scoring.SNAPSHOT_FILE, make_scores(size))
+    else:
+        store = scoring.get_store()
+        batch = []
+        for entry in make_scores(size):
+            batch.append(entry)
+            if len(batch) == 100_000:
+                store.save_many(batch)
+                batch = []
+        store.save_many(batch)
+    scoring.rebuild_leaderboard()
+    scoring.rebuild_player_index()
+    yield "get_top_scores", lambda: scoring.get_top_scores(10)
+    yield "get_top_scores(category)", lambda: scoring.get_top_scores(10, CATEGORIES[0])
+    yield "get_player_stats", lambda: scoring.get_player_stats(player_name(7))
+    yield "save_score", lambda: scoring.save_score("Bench", 5, 10, CATEGORIES[0])
+
+def sound_cases():
+    import sounds
+    yield "generate_tone", lambda: sounds.generate_tone(440, 0.5)
+    for name, generator in sounds.SOUND_GENERATORS.items():
+        yield f"sfx.{name}", generator
+
+def all_cases(scale, backend):
+    question_sizes, score_sizes = SCALES[scale]
+    for size in question_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, func in question_cases(size, tmp):
+                yield f"questions.{name}[{size}]", func
+    for size in score_sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, func in score_cases(size, tmp, backend):
+                yield f"scoring.{name}[{backend},{size}]", func
+    for name, func in sound_cases():
+        yield f"sounds.{name}", func
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(scale, backend, only=None):
+    results = {}
+    for name, func in all_cases(scale, backend):
+        if only and only not in name:
+            continue
+        times, calls = measure(func)
+        results[name] = {"median": statistics.median(times), "min": min(times),
+                         "rounds": len(times), "calls": calls}
+        print(f"{name:<48} {format_time(results[name]['median']):>10}", flush=True)
+    return {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scale": scale,
+            "backend": backend,
+        },
+        "results": results,
+    }
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+def compare(baseline, current, threshold):
+    # Returns the names of cases whose median got slower than the threshold.
+    regressions = []
+    print(f"{'case':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        change = new["median"] / old["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<48} {format_time(old['median']):>10} {format_time(new['median']):>10}"
+              f" {change:>+7.0%}{flag}")
+    return regressions
+
+def load(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.suite")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare this run against a saved results file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two saved results files without running anything")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="slowdown that counts as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args(argv[1:])
+
+    if args.compare:
+        baseline, current = map(load, args.compare)
+    else:
+        current = run(args.scale, args.backend, args.only)
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        baseline = load(args.baseline)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,93 @@
+import json
+import os
+import random
+
+CATEGORIES = ["science", "geography", "history", "pop culture", "technology"]
+POINT_VALUES = [200, 400, 600, 800, 1000]
+
+def make_question(rng, cat, pts, n):
+    options = [f"{cat} option {n}-{i}" for i in range(4)]
+    return {
+        "question": f"Synthetic {cat} question #{n} for ${pts}?",
+        "options": options,
+        "answer": options[rng.randrange(4)],
+        "points": pts,
+    }
+
+def make_bank(per_category, categories=CATEGORIES, seed=0):
+    rng = random.Random(seed)
+    data = {}
+    for cat in categories:
+        data[cat] = [
+            make_question(rng, cat, POINT_VALUES[n % len(POINT_VALUES)], n)
+            for n in range(per_category)
+        ]
+    return data
+
+def player_name(n):
+    return f"Player {n}"
+
+def make_scores(count, players=1000, seed=0):
+    # Yields score entries in the shape scoring.make_entry() produces.
+    rng = random.Random(seed)
+    for n in range(count):
+        total = 10 * rng.randint(3, 10)
+        yield {
+            "name": player_name(rng.randrange(players)),
+            "score": rng.randint(0, total),
+            "total": total,
+            "category": CATEGORIES[rng.randrange(len(CATEGORIES))],
+            "date": f"2024-{1 + n % 12:02d}-{1 + n % 28:02d} 12:00",
+        }
+
+def write_score_snapshot(path, entries):
+    # Streams entries into a scores.snapshot.json without holding them all.
+    with open(path, "w") as f:
+        f.write('{"absorbed": null, "scores": [')
+        for n, entry in enumerate(entries):
+            if n:
+                f.write(", ")
+            f.write(json.dumps(entry))
+        f.write("]}")
+
+def use_data_dir(path):
+    # Points the score store and its indexes at a scratch directory so
+    # benchmarks never touch the real data/.
+    import gamelog
+    import leaderboard
+    import player_index
+    import question_stats
+    import reaction_times
+    import scoring
+    import score_sqlite
+    import widgets
+    scoring.DATA_DIR = path
+    scoring.SCORES_FILE = os.path.join(path, "scores.json")
+    scoring.SNAPSHOT_FILE = os.path.join(path, "scores.snapshot.json")
+    scoring.LOG_FILE = os.path.join(path, "scores.log")
+    scoring.LOCK_FILE = os.path.join(path, "scores.lock")
+    scoring.INDEX_LOCK_FILE = os.path.join(path, "scores.index.lock")
+    score_sqlite.DB_FILE = os.path.join(path, "scores.db")
+    leaderboard.LEADERBOARD_FILE = os.path.join(path, "leaderboard.json")
+    player_index.PLAYER_INDEX_FILE = os.path.join(path, "players.db")
+    reaction_times.REACTION_FILE = os.path.join(path, "reaction.db")
+    reaction_times._store = None
+    gamelog.GAME_LOG_FILE = os.path.join(path, "games.qgl")
+    question_stats.QUESTION_STATS_FILE = os.path.join(path, "question_stats.db")
+    question_stats._store = None
+    widgets.SFX_PLAYER_DIR = os.path.join(path, "sfx_player")
+    widgets._sprite = None
+    widgets._components.pop("sfx_player", None)
+    scoring._store = None
+    scoring._player_index = None
+
+def use_question_dir(path):
+    # Same for the question bank: questions.json / .qpk / .jsonl in path.
+    import questions
+    questions.DATA_FILE = os.path.join(path, "questions.json")
+    questions.PACK_FILE = os.path.join(path, "questions.qpk")
+    questions.JSONL_FILE = os.path.join(path, "questions.jsonl")
+    questions.SNAPSHOT_FILE = os.path.join(path, "questions.snapshot")
+    questions._bank = None
+    questions._bank_stamp = None
+    questions._loaded = (None, None, None)
@@ -0,0 +1,353 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from bisect import insort
+from collections import deque
+from concurrent.futures import Future
+
+# Players buzz from their own devices over TCP (one JSON object per line) or
+# WebSocket (one JSON object per message, needs the websockets package).
+#
+#   client -> server  {"type": "join", "room": "ABCD", "player": "Alice"}
+#                     {"type": "buzz"}
+#                     {"type": "pong", "id": 7}
+#   server -> client  {"type": "joined", "room": "ABCD"}
+#                     {"type": "ping", "id": 7}
+#                     {"type": "open", "question": 3}
+#                     {"type": "buzzed", "position": 1}
+#                     {"type": "locked", "question": 3, "order": [...]}
+#                     {"type": "error", "message": "..."}
+#
+# A buzz is stamped with the server's monotonic clock when it arrives, minus
+# that client's one-way latency (half the smallest recent ping round trip),
+# so a player on slow wifi isn't beaten by one sitting next to the router.
+# Because a far client's buzz can arrive after a near client's later one, the
+# order is held open for a settle window after the first buzz -- the largest
+# latency in the room, capped at MAX_SETTLE -- and then locked.
+
+BUZZER_ADDRESS = os.environ.get("QUIZ_BUZZER", "")
+BUZZER_WS_PORT = os.environ.get("QUIZ_BUZZER_WS", "")
+PING_INTERVAL = 2.0
+RTT_SAMPLES = 8
+MAX_SETTLE = 0.25
+MAX_LINE = 4096
+
+class Client:
+
+    def __init__(self, send):
+        self.send = send
+        self.room = None
+        self.player = None
+        self.rtts = deque(maxlen=RTT_SAMPLES)
+        self.pings = {}
+
+    def latency(self):
+        return min(self.rtts) / 2 if self.rtts else 0.0
+
+class Room:
+    # Rooms only live on the server's event loop. Readers on other threads
+    # (the Streamlit host) use snapshot(), which is replaced wholesale rather
+    # than mutated, so reading it needs no lock.
+
+    def __init__(self, code):
+        self.code = code
+        self.clients = set()
+        self.question = None
+        self.state = "closed"
+        self.buzzes = []
+        self.first_at = None
+        self.snapshot = (None, "closed", ())
+
+    def _publish(self):
+        order = tuple((player, at - self.first_at) for at, player in self.buzzes)
+        self.snapshot = (self.question, self.state, order)
+
+    def _broadcast(self, msg):
+        for client in self.clients:
+            client.send(msg)
+
+    def open(self, question):
+        self.question = question
+        self.state = "open"
+        self.buzzes = []
+        self.first_at = None
+        self._publish()
+        self._broadcast({"type": "open", "question": question})
+
+    def close(self):
+        self.state = "closed"
+        self._publish()
+
+    def buzz(self, client, arrived):
+        if self.state == "closed" or any(p == client.player for _, p in self.buzzes):
+            return
+        # Never credit more than the settle window, or a client could win by
+        # inflating its RTT.
+        at = arrived - min(client.latency(), MAX_SETTLE)
+        if self.state == "locked":
+            # The order is out; late buzzes join the back of it.
+            at = max(at, self.buzzes[-1][0])
+            self.buzzes.append((at, client.player))
+        else:
+            insort(self.buzzes, (at, client.player))
+        if self.first_at is None or at < self.first_at:
+            self.first_at = at
+        if self.state == "open":
+            self.state = "settling"
+            settle = min(MAX_SETTLE, max(c.latency() for c in self.clients))
+            question = self.question
+            asyncio.get_running_loop().call_later(settle, self._lock, question)
+        self._publish()
+        position = [p for _, p in self.buzzes].index(client.player) + 1
+        client.send({"type": "buzzed", "position": position})
+        if self.state == "locked":
+            self._broadcast_order()
+
+    def _lock(self, question):
+        if self.state != "settling" or self.question != question:
+            return
+        self.state = "locked"
+        self._publish()
+        self._broadcast_order()
+
+    def _broadcast_order(self):
+        self._broadcast({"type": "locked", "question": self.question,
+                         "order": [p for _, p in self.buzzes]})
+
+class BuzzerServer:
+
+    def __init__(self):
+        self.rooms = {}
+        self.loop = None
+        self._ping_ids = itertools.count(1)
+        self._servers = []
+
+    def room(self, code):
+        room = self.rooms.get(code)
+        if room is None:
+            room = self.rooms[code] = Room(code)
+        return room
+
+    def _handle(self, client, msg):
+        kind = msg.get("type")
+        if kind == "pong":
+            sent = client.pings.pop(msg.get("id"), None)
+            if sent is not None:
+                client.rtts.append(time.monotonic() - sent)
+        elif kind == "buzz":
+            if client.room is not None:
+                client.room.buzz(client, time.monotonic())
+        elif kind == "join":
+            code, player = msg.get("room"), msg.get("player")
+            if not isinstance(code, str) or not isinstance(player, str) or not player.strip():
+                client.send({"type": "error", "message": "join needs a room and a player name"})
+                return
+            self._leave(client)
+            client.room = self.room(code.upper())
+            client.player = player.strip()
+            client.room.clients.add(client)
+            client.send({"type": "joined", "room": client.room.code})
+            if client.room.state != "closed":
+                client.send({"type": "open", "question": client.room.question})
+        else:
+            client.send({"type": "error", "message": f"unknown message type {kind!r}"})
+
+    def _leave(self, client):
+        room = client.room
+        if room is not None:
+            room.clients.discard(client)
+            if not room.clients and room.state == "closed":
+                self.rooms.pop(room.code, None)
+        client.room = None
+
+    async def _pinger(self, client):
+        while True:
+            ping_id = next(self._ping_ids)
+            client.pings = {k: v for k, v in client.pings.items() if k > ping_id - RTT_SAMPLES}
+            client.pings[ping_id] = time.monotonic()
+            client.send({"type": "ping", "id": ping_id})
+            await asyncio.sleep(PING_INTERVAL)
+
+    async def _serve_client(self, client, messages):
+        pinger = asyncio.ensure_future(self._pinger(client))
+        try:
+            async for raw in messages:
+                try:
+                    msg = json.loads(raw)
+                except ValueError:
+                    client.send({"type": "error", "message": "messages must be JSON"})
+                    continue
+                if isinstance(msg, dict):
+                    self._handle(client, msg)
+        finally:
+            pinger.cancel()
+            self._leave(client)
+
+    async def _tcp_client(self, reader, writer):
+        def send(msg):
+            if not writer.is_closing():
+                writer.write(json.dumps(msg).encode() + b"\n")
+
+        async def lines():
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    return
+                if not line:
+                    return
+                yield line
+
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            import socket
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            await self._serve_client(Client(send), lines())
+        finally:
+            writer.close()
+
+    async def _ws_client(self, ws):
+        def send(msg):
+            asyncio.ensure_future(ws.send(json.dumps(msg)))
+
+        async def messages():
+            try:
+                async for raw in ws:
+                    yield raw
+            except Exception:
+                return
+
+        await self._serve_client(Client(send), messages())
+
+    async def start(self, host, port, ws_port=None):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._tcp_client, host, port, limit=MAX_LINE)
+        self._servers.append(server)
+        if ws_port:
+            from websockets.asyncio.server import serve
+            self._servers.append(await serve(self._ws_client, host, ws_port))
+        return server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        for server in self._servers:
+            server.close()
+        self._servers = []
+
+    # Called from other threads (the Streamlit host).
+
+    def open_question(self, code, question):
+        self.loop.call_soon_threadsafe(lambda: self.room(code).open(question))
+
+    def close_question(self, code):
+        self.loop.call_soon_threadsafe(lambda: self.room(code).close())
+
+    def buzz_order(self, code, question):
+        room = self.rooms.get(code)
+        if room is None:
+            return ()
+        snap_question, _, order = room.snapshot
+        return order if snap_question == question else ()
+
+    def players(self, code):
+        room = self.rooms.get(code)
+        return sorted(c.player for c in list(room.clients)) if room else []
+
+def _split_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "0.0.0.0", int(port)
+
+_server = None
+_server_lock = threading.Lock()
+
+def get_server():
+    # The Streamlit app's buzzer: started on first use in a background thread
+    # when QUIZ_BUZZER is set (e.g. "0.0.0.0:8765"), otherwise None. If it
+    # can't start (port taken, websockets missing) the error is raised here
+    # and nothing is kept, so the next call tries again.
+    global _server
+    if not BUZZER_ADDRESS:
+        return None
+    with _server_lock:
+        if _server is None:
+            server = BuzzerServer()
+            started = Future()
+
+            def run():
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+                try:
+                    host, port = _split_address(BUZZER_ADDRESS)
+                    loop.run_until_complete(server.start(host, port, int(BUZZER_WS_PORT or 0)))
+                except BaseException as e:
+                    server.stop()
+                    loop.close()
+                    started.set_exception(e)
+                    return
+                started.set_result(None)
+                loop.run_forever()
+
+            threading.Thread(target=run, name="buzzer", daemon=True).start()
+            started.result(10)
+            _server = server
+    return _server
+
+async def _client(host, port, room, player):
+    # Local test client: press Enter to buzz.
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(json.dumps({"type": "join", "room": room, "player": player}).encode() + b"\n")
+    loop = asyncio.get_running_loop()
+
+    async def keyboard():
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            writer.write(b'{"type": "buzz"}\n')
+
+    asyncio.ensure_future(keyboard())
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        msg = json.loads(line)
+        if msg["type"] == "ping":
+            writer.write(json.dumps({"type": "pong", "id": msg["id"]}).encode() + b"\n")
+        elif msg["type"] == "open":
+            print("Question open -- press Enter to buzz!")
+        elif msg["type"] == "buzzed":
+            print(f"Buzzed in at #{msg['position']}")
+        elif msg["type"] == "locked":
+            print("Order: " + ", ".join(msg["order"]))
+        else:
+            print(msg)
+
+async def _serve_forever(address, ws_port):
+    server = BuzzerServer()
+    host, port = _split_address(address)
+    port = await server.start(host, port, ws_port)
+    print(f"Buzzer listening on {host}:{port}" + (f", websocket on {ws_port}" if ws_port else ""))
+    await asyncio.Event().wait()
+
+def main(argv):
+    if len(argv) >= 3 and argv[1] == "serve":
+        ws_port = int(argv[3]) if len(argv) > 3 else None
+        asyncio.run(_serve_forever(argv[2], ws_port))
+        return 0
+    if len(argv) == 5 and argv[1] == "client":
+        host, port = _split_address(argv[2])
+        asyncio.run(_client(host, port, argv[3], argv[4]))
+        return 0
+    print("usage: python3 buzzer.py serve HOST:PORT [WS_PORT]")
+    print("       python3 buzzer.py client HOST:PORT ROOM PLAYER")
+    return 2
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv))
+    except KeyboardInterrupt:
+        pass
@@ -110,7 +110,19 @@ def show_leaderboard(scores):
         print(f"  {color}{i}. {s['name']} - {s['score']}/{s['total']} ({s['category']}) {s['date']}{RESET}")
     print()
 
-def show_player_stats(name, stats):
+def _secs(seconds):
+    return f"{seconds:.1f}s" if seconds is not None else "-"
+
+def show_reaction_times(reaction):
+    print(f"  {BOLD}Answer speed:{RESET} median {_secs(reaction['median'])},"
+          f" 90% within {_secs(reaction['p90'])} ({reaction['answers']} answers)")
+    for cat, data in reaction["categories"].items():
+        print(f"    {cat.title():12s} median {_secs(data['median'])}")
+    for pts, data in reaction["points"].items():
+        print(f"    {str(pts) + ' pts':12s} median {_secs(data['median'])}")
+    print()
+
+def show_player_stats(name, stats, reaction=None):
     print()
     print("=" * 40)
     print(f"       {BOLD}STATS FOR {name.upper()}{RESET}")
@@ -134,3 +146,6 @@ def show_player_stats(name, stats):
         color = GREEN if cat_pct >= 50 else RED
         print(f"    {cat.title():12s} {color}{data['correct']}/{data['total']} ({cat_pct}%){RESET}")
     print()
+
+    if reaction:
+        show_reaction_times(reaction)
@@ -0,0 +1,274 @@
+import random
+import string
+import threading
+import time
+from array import array
+from collections import namedtuple
+from questions import get_point_values, build_board
+from timer import QUESTION_TIME_LIMIT, BONUS_STEPS, SLOW_BONUS, time_bonus
+
+# Game rules with no UI attached. app.py and main.py only render state from
+# here and call its methods; nothing in this module touches Streamlit.
+#
+# Board cells are numbered category-major, cell = cat_index * len(point_values)
+# + points_index, so the set of used cells is a single int bitmask and each
+# history record stores one small int instead of the category name and the
+# question text.
+#
+# A room's listener, if set, is called as listener(kind, now, *args) after
+# every change: ("pick", cell), ("pause",), ("resume",), ("award", player,
+# correct, elapsed), ("skip",), ("end",). "end" also follows the turn that
+# uses the last cell. gamelog.py records these.
+
+NOBODY = -1
+ROOM_CODE_LENGTH = 4
+IDLE_TIMEOUT = 6 * 60 * 60
+POINTS_PER_QUESTION = 10
+
+# Scoring knobs, so simulate.py can try out variants. wrong_penalty is the
+# fraction of a cell's value lost on a wrong answer.
+Rules = namedtuple("Rules", "bonus_steps slow_bonus wrong_penalty")
+DEFAULT_RULES = Rules(BONUS_STEPS, SLOW_BONUS, 1.0)
+
+class Turn:
+    # elapsed is seconds from the question opening to the answer, None for
+    # skips.
+    __slots__ = ("player", "cell", "correct", "earned", "bonus", "elapsed")
+
+    def __init__(self, player, cell, correct, earned, bonus, elapsed=None):
+        self.player = player
+        self.cell = cell
+        self.correct = correct
+        self.earned = earned
+        self.bonus = bonus
+        self.elapsed = elapsed
+
+class Room:
+    __slots__ = ("code", "players", "scores", "board", "categories", "point_values",
+                 "used", "current", "started_at", "frozen_at", "history", "ended",
+                 "last_active", "rules", "listener", "_lock")
+
+    def __init__(self, code, players, board=None, point_values=None, rules=DEFAULT_RULES):
+        self.code = code
+        self.rules = rules
+        self.board = build_board() if board is None else board
+        self.categories = tuple(self.board)
+        self.point_values = tuple(point_values or get_point_values())
+        self.players = tuple(players)
+        self.scores = [0] * len(self.players)
+        self.used = 0
+        self.current = None
+        self.started_at = None
+        self.frozen_at = None
+        self.history = []
+        self.ended = False
+        self.last_active = time.monotonic()
+        self.listener = None
+        # Rooms are shared by everyone viewing them, so every change checks
+        # and updates state under this.
+        self._lock = threading.Lock()
+
+    def _emit(self, kind, now, *args):
+        if self.listener is not None:
+            self.listener(kind, time.time() if now is None else now, *args)
+
+    @property
+    def cell_count(self):
+        return len(self.categories) * len(self.point_values)
+
+    @property
+    def max_score(self):
+        return sum(self.point_values) * len(self.categories)
+
+    def cell(self, cat, pts):
+        return self.categories.index(cat) * len(self.point_values) + self.point_values.index(pts)
+
+    def cell_info(self, cell):
+        cat, pts = divmod(cell, len(self.point_values))
+        return self.categories[cat], self.point_values[pts]
+
+    def is_used(self, cat, pts):
+        return bool(self.used >> self.cell(cat, pts) & 1)
+
+    @property
+    def finished(self):
+        return self.ended or self.used == (1 << self.cell_count) - 1
+
+    @property
+    def screen(self):
+        if self.finished:
+            return "final"
+        return "board" if self.current is None else "question"
+
+    @property
+    def question(self):
+        if self.current is None:
+            return None
+        cat, pts = self.cell_info(self.current)
+        return self.board[cat][pts]
+
+    @property
+    def paused(self):
+        return self.frozen_at is not None
+
+    def pick(self, cat, pts, now=None):
+        cell = self.cell(cat, pts)
+        with self._lock:
+            if self.finished or self.current is not None or self.used >> cell & 1:
+                raise ValueError(f"{cat} ${pts} can't be picked now")
+            self.current = cell
+            self.started_at = time.time() if now is None else now
+            self.frozen_at = None
+            self._emit("pick", self.started_at, cell)
+        return self.board[cat][pts]
+
+    def pause(self, now=None):
+        with self._lock:
+            if self.current is not None and self.frozen_at is None:
+                self.frozen_at = time.time() if now is None else now
+                self._emit("pause", self.frozen_at)
+
+    def resume(self, now=None):
+        with self._lock:
+            if self.frozen_at is not None:
+                now = time.time() if now is None else now
+                self.started_at += now - self.frozen_at
+                self.frozen_at = None
+                self._emit("resume", now)
+
+    def elapsed(self, now=None):
+        if self.frozen_at is not None:
+            now = self.frozen_at
+        elif now is None:
+            now = time.time()
+        return now - self.started_at
+
+    def time_remaining(self, now=None):
+        return max(0, QUESTION_TIME_LIMIT - self.elapsed(now))
+
+    def award(self, player, correct, elapsed=None, now=None):
+        # player is an index into self.players.
+        with self._lock:
+            if self.current is None:
+                raise ValueError("no question is open")
+            _, pts = self.cell_info(self.current)
+            rules = self.rules
+            if elapsed is None:
+                elapsed = self.elapsed(now)
+            if correct:
+                bonus = time_bonus(elapsed, rules.bonus_steps, rules.slow_bonus)
+                earned = int(pts * bonus)
+            else:
+                bonus = None
+                earned = -int(pts * rules.wrong_penalty)
+            self.scores[player] += earned
+            turn = self._finish_turn(Turn(player, self.current, correct, earned, bonus, elapsed))
+            self._emit("award", now, player, correct, elapsed)
+            if self.finished:
+                self._emit("end", now)
+        return turn
+
+    def skip(self, now=None):
+        with self._lock:
+            if self.current is None:
+                raise ValueError("no question is open")
+            turn = self._finish_turn(Turn(NOBODY, self.current, False, 0, None))
+            self._emit("skip", now)
+            if self.finished:
+                self._emit("end", now)
+        return turn
+
+    def _finish_turn(self, turn):
+        self.used |= 1 << turn.cell
+        self.history.append(turn)
+        self.current = None
+        self.frozen_at = None
+        return turn
+
+    def end(self, now=None):
+        with self._lock:
+            was_finished = self.finished
+            self.ended = True
+            self.current = None
+            if not was_finished:
+                self._emit("end", now)
+
+    def standings(self):
+        return sorted(zip(self.players, self.scores), key=lambda x: x[1], reverse=True)
+
+    def answer_times(self):
+        # (player name, category, points, seconds) for every answered turn.
+        return [(self.players[t.player],) + self.cell_info(t.cell) + (t.elapsed,)
+                for t in self.history if t.player != NOBODY]
+
+class RoomRegistry:
+    # Every game a process is hosting, by room code. Rooms nobody has looked
+    # up for IDLE_TIMEOUT seconds are dropped when new ones are created.
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def create(self, players, board=None, point_values=None):
+        with self._lock:
+            self._sweep()
+            while True:
+                code = "".join(random.choices(string.ascii_uppercase, k=ROOM_CODE_LENGTH))
+                if code not in self._rooms:
+                    break
+            room = self._rooms[code] = Room(code, players, board, point_values)
+        return room
+
+    def get(self, code):
+        room = self._rooms.get(code)
+        if room is not None:
+            room.last_active = time.monotonic()
+        return room
+
+    def remove(self, code):
+        with self._lock:
+            self._rooms.pop(code, None)
+
+    def _sweep(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for code in [c for c, r in self._rooms.items() if r.last_active < cutoff]:
+            del self._rooms[code]
+
+rooms = RoomRegistry()
+
+class QuizRound:
+    # The CLI's multiple-choice round: up to POINTS_PER_QUESTION per correct
+    # answer, one less for every full second taken, never below 1.
+
+    __slots__ = ("questions", "score", "times", "hits")
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.score = 0
+        self.times = array("d")
+        # Bit i set when question i was answered correctly.
+        self.hits = 0
+
+    @property
+    def max_points(self):
+        return len(self.questions) * POINTS_PER_QUESTION
+
+    def answer(self, index, choice, elapsed):
+        q = self.questions[index]
+        correct = q["options"][choice] == q["answer"]
+        points = max(1, POINTS_PER_QUESTION - int(elapsed)) if correct else 0
+        self.score += points
+        self.hits |= correct << len(self.times)
+        self.times.append(elapsed)
+        return correct, points
+
+    def answer_times(self, name, category):
+        return [(name, category, q["points"], t) for q, t in zip(self.questions, self.times)]
+
+    def results(self):
+        # (question, correct, seconds) for every answered question.
+        return [(q, bool(self.hits >> i & 1), t) for i, (q, t) in enumerate(zip(self.questions, self.times))]
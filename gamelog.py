@@ -0,0 +1,346 @@
+import argparse
+import csv
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from engine import Room, Rules, DEFAULT_RULES
+from storage import file_lock
+
+GAME_LOG_FILE = os.environ.get("QUIZ_GAME_LOG") or os.path.join(
+    os.path.dirname(__file__), "data", "games.qgl")
+
+# Every action of every game, appended as it happens. Games played at the
+# same time interleave, so each record names its game.
+#
+#   file     MAGIC, then records
+#   record   RECORD header (kind, game id, ms since the game started,
+#            payload length) followed by the payload
+#   START    u64 start time (ms since the epoch), players, categories and
+#            point values as counted lists, one u64 question id per cell
+#            (questions.question_id), then the scoring rules
+#   PICK     u8 cell
+#   AWARD    u8 player, f64 answer time in seconds (correct answer)
+#   WRONG    u8 player, f64 answer time in seconds
+#   SKIP, PAUSE, RESUME, END   no payload
+#
+# Replaying a game's records through engine.Room rebuilds its state at any
+# point, and replaying under different Rules re-scores it.
+
+MAGIC = b"QGL1"
+RECORD = struct.Struct("<BQIH")
+START, PICK, AWARD, WRONG, SKIP, PAUSE, RESUME, END = range(8)
+KIND_NAMES = ("start", "pick", "award", "wrong", "skip", "pause", "resume", "end")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U64 = struct.Struct("<Q")
+_F32 = struct.Struct("<f")
+_PLAYER_TIME = struct.Struct("<Bd")
+
+_write_lock = threading.Lock()
+# Logs this process has checked for a torn tail before appending.
+_opened = set()
+
+def _pack_strings(strings):
+    out = [_U8.pack(len(strings))]
+    for s in strings:
+        data = s.encode("utf-8")
+        out.append(_U16.pack(len(data)) + data)
+    return b"".join(out)
+
+def _unpack_strings(buf, at):
+    n, = _U8.unpack_from(buf, at)
+    at += 1
+    strings = []
+    for _ in range(n):
+        size, = _U16.unpack_from(buf, at)
+        at += 2
+        strings.append(buf[at:at + size].decode("utf-8"))
+        at += size
+    return strings, at
+
+def encode_start(room, started, question_ids):
+    rules = room.rules
+    parts = [
+        _U64.pack(int(started * 1000)),
+        _pack_strings(room.players),
+        _pack_strings(room.categories),
+        _U8.pack(len(room.point_values)),
+        b"".join(_U16.pack(p) for p in room.point_values),
+        b"".join(_U64.pack(q) for q in question_ids),
+        _U8.pack(len(rules.bonus_steps)),
+        b"".join(_F32.pack(limit) + _F32.pack(bonus) for limit, bonus in rules.bonus_steps),
+        _F32.pack(rules.slow_bonus),
+        _F32.pack(rules.wrong_penalty),
+    ]
+    return b"".join(parts)
+
+def decode_start(payload):
+    started, = _U64.unpack_from(payload, 0)
+    players, at = _unpack_strings(payload, 8)
+    categories, at = _unpack_strings(payload, at)
+    n_points, = _U8.unpack_from(payload, at)
+    at += 1
+    point_values = list(struct.unpack_from(f"<{n_points}H", payload, at))
+    at += 2 * n_points
+    n_cells = len(categories) * n_points
+    question_ids = list(struct.unpack_from(f"<{n_cells}Q", payload, at))
+    at += 8 * n_cells
+    n_steps, = _U8.unpack_from(payload, at)
+    at += 1
+    floats = struct.unpack_from(f"<{2 * n_steps + 2}f", payload, at)
+    steps = tuple((round(floats[2 * i], 3), round(floats[2 * i + 1], 3)) for i in range(n_steps))
+    rules = Rules(steps, round(floats[-2], 3), round(floats[-1], 3))
+    return {"started": started / 1000, "players": players, "categories": categories,
+            "point_values": point_values, "question_ids": question_ids, "rules": rules}
+
+class GameRecorder:
+    # Attach to a room to log it: GameRecorder(room).attach(). Records are
+    # appended with one write() each on an O_APPEND descriptor; the log is
+    # fsync'd when the game ends. The first write from a process cuts off
+    # any torn record a crash left at the end, so new records never land
+    # at the wrong offset.
+
+    def __init__(self, room, path=None):
+        from questions import question_id
+        self.room = room
+        self.path = path or GAME_LOG_FILE
+        self.game_id = int.from_bytes(os.urandom(8), "little")
+        self.started = time.time()
+        ids = []
+        for cell in range(room.cell_count):
+            cat, pts = room.cell_info(cell)
+            q = room.board.get(cat, {}).get(pts)
+            ids.append(question_id(q) if q is not None else 0)
+        self._write(START, self.started, encode_start(room, self.started, ids))
+
+    def attach(self):
+        self.room.listener = self.on_event
+        return self
+
+    def _write(self, kind, now, payload=b"", sync=False):
+        t_ms = max(0, int((now - self.started) * 1000))
+        record = RECORD.pack(kind, self.game_id, t_ms, len(payload)) + payload
+        with _write_lock:
+            if self.path not in _opened:
+                _repair(self.path)
+                _opened.add(self.path)
+            with file_lock(self.path + ".lock", shared=True):
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+                try:
+                    os.write(fd, record)
+                    if sync:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+    def on_event(self, kind, now, *args):
+        if kind == "pick":
+            self._write(PICK, now, _U8.pack(args[0]))
+        elif kind == "award":
+            player, correct, elapsed = args
+            self._write(AWARD if correct else WRONG, now,
+                        _PLAYER_TIME.pack(player, elapsed))
+        elif kind == "skip":
+            self._write(SKIP, now)
+        elif kind == "pause":
+            self._write(PAUSE, now)
+        elif kind == "resume":
+            self._write(RESUME, now)
+        elif kind == "end":
+            self._write(END, now, sync=True)
+
+def _records(buf):
+    # Yields (kind, game_id, t_ms, payload, end offset) for every complete
+    # record; stops at a torn or unreadable one.
+    at = len(MAGIC)
+    while at + RECORD.size <= len(buf):
+        kind, game_id, t_ms, size = RECORD.unpack_from(buf, at)
+        end = at + RECORD.size + size
+        if kind > END or end > len(buf):
+            return
+        yield kind, game_id, t_ms, buf[at + RECORD.size:end], end
+        at = end
+
+def _repair(path):
+    # Creates the log, or truncates it after its last complete record.
+    # Appenders hold the lock shared, so nobody is mid-write meanwhile.
+    with file_lock(path + ".lock"):
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with os.fdopen(os.dup(fd), "rb") as f:
+                buf = f.read()
+            if buf[:len(MAGIC)] != MAGIC:
+                if buf:
+                    raise ValueError(f"{path} is not a game log")
+                os.write(fd, MAGIC)
+                return
+            end = len(MAGIC)
+            for *_, end in _records(buf):
+                pass
+            if end < len(buf):
+                os.ftruncate(fd, end)
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def read_records(path=None):
+    # Yields (kind, game_id, t_ms, payload). A record cut short by a crash
+    # ends the log.
+    with open(path or GAME_LOG_FILE, "rb") as f:
+        buf = f.read()
+    if buf[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path or GAME_LOG_FILE} is not a game log")
+    for kind, game_id, t_ms, payload, _ in _records(buf):
+        yield kind, game_id, t_ms, payload
+
+def read_games(path=None):
+    # {game_id: [(kind, t_ms, payload), ...]} in log order. Games whose
+    # first record isn't START can't be replayed and are left out.
+    games = {}
+    for kind, game_id, t_ms, payload in read_records(path):
+        if game_id not in games:
+            games[game_id] = [] if kind == START else None
+        records = games[game_id]
+        if records is not None:
+            records.append((kind, t_ms, payload))
+    return {game_id: records for game_id, records in games.items() if records is not None}
+
+def _board(start, resolve):
+    board = {}
+    n_points = len(start["point_values"])
+    for cell, qid in enumerate(start["question_ids"]):
+        cat = start["categories"][cell // n_points]
+        pts = start["point_values"][cell % n_points]
+        q = resolve(qid) if resolve else None
+        board.setdefault(cat, {})[pts] = q if q is not None else {"id": qid}
+    return board
+
+def replay(records, until=None, rules=None, resolve=None):
+    # Rebuilds a Room from one game's records, stopping after `until` records
+    # if given. rules overrides the rules the game was played with; resolve
+    # maps question ids back to questions (e.g. questions.question_by_id).
+    kind, _, payload = records[0]
+    if kind != START:
+        raise ValueError("game log doesn't begin with a start record")
+    start = decode_start(payload)
+    room = Room(None, start["players"], _board(start, resolve), start["point_values"],
+                rules or start["rules"])
+    t0 = start["started"]
+    for kind, t_ms, payload in records[1:until]:
+        now = t0 + t_ms / 1000
+        if kind == PICK:
+            room.pick(*room.cell_info(payload[0]), now=now)
+        elif kind == AWARD or kind == WRONG:
+            player, elapsed = _PLAYER_TIME.unpack(payload)
+            room.award(player, kind == AWARD, elapsed=elapsed)
+        elif kind == SKIP:
+            room.skip(now)
+        elif kind == PAUSE:
+            room.pause(now)
+        elif kind == RESUME:
+            room.resume(now)
+        elif kind == END:
+            room.end(now)
+    return room
+
+def game_summary(game_id, records, rules=None):
+    room = replay(records, rules=rules)
+    start = decode_start(records[0][2])
+    return {
+        "game": f"{game_id:016x}",
+        "started": start["started"],
+        "players": list(room.players),
+        "scores": list(room.scores),
+        "finished": room.finished,
+        "turns": [
+            {"player": room.players[t.player] if t.player >= 0 else None,
+             "category": room.cell_info(t.cell)[0], "points": room.cell_info(t.cell)[1],
+             "correct": t.correct, "earned": t.earned, "elapsed": t.elapsed}
+            for t in room.history
+        ],
+    }
+
+def export_jsonl(out, path=None):
+    count = 0
+    for game_id, records in read_games(path).items():
+        out.write(json.dumps(game_summary(game_id, records)) + "\n")
+        count += 1
+    return count
+
+def export_csv(out, path=None):
+    # One row per event, for spreadsheets.
+    writer = csv.writer(out)
+    writer.writerow(["game", "event", "ms", "cell", "player", "answer_secs"])
+    count = 0
+    started = set()
+    for kind, game_id, t_ms, payload in read_records(path):
+        if kind == START:
+            started.add(game_id)
+        elif game_id not in started:
+            continue
+        cell = player = answer = ""
+        if kind == PICK:
+            cell = payload[0]
+        elif kind in (AWARD, WRONG):
+            player, answer = _PLAYER_TIME.unpack(payload)
+            answer = round(answer, 3)
+        writer.writerow([f"{game_id:016x}", KIND_NAMES[kind], t_ms, cell, player, answer])
+        count += 1
+    return count
+
+def _find_game(games, prefix):
+    matches = [g for g in games if f"{g:016x}".startswith(prefix)]
+    if len(matches) != 1:
+        raise SystemExit(f"{len(matches)} games match {prefix!r}")
+    return matches[0]
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="gamelog.py", description="Inspect the binary game log")
+    parser.add_argument("--log", default=None, help=f"log file (default {GAME_LOG_FILE})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="one line per game")
+    p = sub.add_parser("replay", help="state of one game, optionally after N events")
+    p.add_argument("game", help="game id or a unique prefix of it")
+    p.add_argument("--at", type=int, default=None, help="stop after this many events")
+    p = sub.add_parser("export", help="all games as JSON lines or events as CSV")
+    p.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    p = sub.add_parser("rescore", help="replay every game under different rules")
+    p.add_argument("--penalty", type=float, default=DEFAULT_RULES.wrong_penalty)
+    p.add_argument("--slow-bonus", type=float, default=DEFAULT_RULES.slow_bonus)
+    args = parser.parse_args(argv[1:])
+
+    if args.command == "export":
+        export = export_jsonl if args.format == "jsonl" else export_csv
+        export(sys.stdout, args.log)
+        return 0
+
+    games = read_games(args.log)
+    if args.command == "list":
+        for game_id, records in games.items():
+            s = game_summary(game_id, records)
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(s["started"]))
+            scores = ", ".join(f"{p} {v}" for p, v in zip(s["players"], s["scores"]))
+            print(f"{s['game']}  {when}  {len(records):4d} events  {scores}")
+    elif args.command == "replay":
+        game_id = _find_game(games, args.game)
+        until = None if args.at is None else args.at + 1
+        room = replay(games[game_id], until=until)
+        print(f"after {len(games[game_id][:until]) - 1} events: {room.screen}")
+        for player, score in zip(room.players, room.scores):
+            print(f"  {player}: {score}")
+    elif args.command == "rescore":
+        changed = 0
+        for game_id, records in games.items():
+            played = replay(records)
+            rules = played.rules._replace(wrong_penalty=args.penalty, slow_bonus=args.slow_bonus)
+            rescored = replay(records, rules=rules)
+            if played.standings()[0][0] != rescored.standings()[0][0]:
+                changed += 1
+        print(f"{len(games)} games replayed; winner changes in {changed}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,92 @@
+import json
+import os
+import sys
+from bisect import bisect_right
+from storage import atomic_write_json
+
+LEADERBOARD_FILE = os.path.join(os.path.dirname(__file__), "data", "leaderboard.json")
+# Largest top-N served from the materialized board; bigger requests go to the
+# score store.
+CAPACITY = 50
+
+# The board keeps the best CAPACITY scores overall and per category, each list
+# ordered like a stable sort of the full history by score: highest first, ties
+# in the order they were saved. "seq" is an entry's position in that history
+# and "count" the number of scores the board has seen, which is the next seq.
+
+def _sort_key(entry):
+    return (-entry["score"], entry["seq"])
+
+def _public(entry):
+    return {k: v for k, v in entry.items() if k != "seq"}
+
+def empty():
+    return {"count": 0, "overall": [], "categories": {}}
+
+def _insert(ranked, entry):
+    if len(ranked) >= CAPACITY and _sort_key(entry) >= _sort_key(ranked[-1]):
+        return
+    at = bisect_right([_sort_key(e) for e in ranked], _sort_key(entry))
+    ranked.insert(at, entry)
+    del ranked[CAPACITY:]
+
+def add(board, entries):
+    for e in entries:
+        entry = dict(e, seq=board["count"])
+        board["count"] += 1
+        _insert(board["overall"], entry)
+        _insert(board["categories"].setdefault(entry["category"], []), entry)
+    return board
+
+def build(scores):
+    return add(empty(), scores)
+
+def load(path=None):
+    path = path or LEADERBOARD_FILE
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+def save(board, path=None):
+    atomic_write_json(path or LEADERBOARD_FILE, board)
+
+def delete(path=None):
+    path = path or LEADERBOARD_FILE
+    if os.path.exists(path):
+        os.remove(path)
+
+def top(board, limit, category=None):
+    ranked = board["overall"] if category is None else board["categories"].get(category, [])
+    return [_public(e) for e in ranked[:limit]]
+
+def check(board, scores):
+    # Differences between a stored board and one rebuilt from the history.
+    expected = build(scores)
+    problems = []
+    if board["count"] != expected["count"]:
+        problems.append(f"board has seen {board['count']} scores, history has {expected['count']}")
+    if board["overall"] != expected["overall"]:
+        problems.append("overall ranking differs")
+    for cat in sorted(set(board["categories"]) | set(expected["categories"])):
+        if board["categories"].get(cat) != expected["categories"].get(cat):
+            problems.append(f"ranking for {cat!r} differs")
+    return problems
+
+def main(argv):
+    import scoring
+    if len(argv) != 2 or argv[1] not in ("rebuild", "check"):
+        print("usage: python3 leaderboard.py rebuild|check")
+        return 2
+    if argv[1] == "rebuild":
+        count = scoring.rebuild_leaderboard()
+        print(f"Rebuilt leaderboard from {count} scores")
+        return 0
+    problems = scoring.check_leaderboard()
+    for p in problems:
+        print(f"  {p}")
+    print("Leaderboard is consistent" if not problems else "Leaderboard has drifted; run rebuild")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
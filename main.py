@@ -1,12 +1,15 @@
 import time
-from questions import get_categories, get_questions, get_difficulties
-from scoring import save_score, get_top_scores, get_player_stats
+from questions import stream_categories, stream_questions, get_difficulties, question_id
 from display import (
     show_welcome, show_menu, show_question,
     show_result, show_final_score, show_leaderboard,
     show_difficulty_menu, show_player_stats
 )
 
+# Only what the menu needs is imported up front. Scoring (SQLite, locking,
+# the leaderboard) and the game engine load when an action first uses them;
+# benchmarks/startup.py keeps an eye on this.
+
 def get_choice(prompt, max_val):
     while True:
         try:
@@ -27,37 +30,39 @@ def pick_difficulty():
 
 def play_round(category):
     difficulty = pick_difficulty()
-    questions = get_questions(category, difficulty)
+    questions = stream_questions(category, difficulty)
 
     if not questions:
         print("  No questions for that difficulty. Try another!")
         return
 
-    score = 0
-    max_points = len(questions) * 10
+    from engine import QuizRound
+    quiz = QuizRound(questions)
 
     for i, q in enumerate(questions, 1):
         show_question(i, len(questions), q)
         start = time.time()
         choice = get_choice("  Your answer: ", len(q["options"]))
         elapsed = time.time() - start
-        picked = q["options"][choice - 1]
-        correct = picked == q["answer"]
-        points = max(1, 10 - int(elapsed)) if correct else 0
-        score += points
+        correct, points = quiz.answer(i - 1, choice - 1, elapsed)
         show_result(correct, q["answer"], elapsed, points)
 
-    show_final_score(score, max_points)
+    show_final_score(quiz.score, quiz.max_points)
+    from question_stats import get_store as get_question_stats
+    get_question_stats().record_results((question_id(q), correct, t) for q, correct, t in quiz.results())
 
     name = input("\nEnter your name for the leaderboard: ").strip()
     if name:
-        save_score(name, score, max_points, category)
+        from scoring import save_score
+        from reaction_times import get_store
+        save_score(name, quiz.score, quiz.max_points, category)
+        get_store().record_many(quiz.answer_times(name, category))
 
 def main():
     show_welcome()
 
     while True:
-        categories = get_categories()
+        categories = stream_categories()
         show_menu(categories)
 
         choice = get_choice("Your choice: ", len(categories) + 3)
@@ -66,12 +71,15 @@ def main():
             print("Thanks for playing!\n")
             break
         elif choice == len(categories) + 1:
+            from scoring import get_top_scores
             show_leaderboard(get_top_scores())
         elif choice == len(categories) + 2:
             name = input("Enter your name: ").strip()
             if name:
+                from scoring import get_player_stats
+                from reaction_times import get_store
                 stats = get_player_stats(name)
-                show_player_stats(name, stats)
+                show_player_stats(name, stats, get_store().summary(name))
         else:
             category = categories[choice - 1]
             play_round(category)
@@ -0,0 +1,196 @@
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+# Opt-in latency histograms for the app's hot paths. With QUIZ_METRICS=1,
+# functions wrapped in timed() and blocks in phase() are timed into fixed
+# buckets shared by the whole process. They are exported in Prometheus text
+# format over HTTP (QUIZ_METRICS_PORT, path /metrics) and/or to a file
+# rewritten every few seconds (QUIZ_METRICS_FILE). Disabled, timed() returns
+# the function unchanged and phase() a shared no-op context manager.
+
+ENABLED = os.environ.get("QUIZ_METRICS") == "1"
+METRICS_PORT = os.environ.get("QUIZ_METRICS_PORT", "")
+METRICS_FILE = os.environ.get("QUIZ_METRICS_FILE", "")
+FILE_INTERVAL = 5.0
+METRIC_NAME = "quiz_phase_seconds"
+# Runs kept per session for the debug panel.
+SESSION_RUNS = 200
+# Upper bounds in seconds; anything slower lands in the +Inf bucket.
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NOOP = nullcontext()
+
+class Histogram:
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def percentile(self, p):
+        # Linear interpolation inside the bucket holding the p-th value.
+        if not self.count:
+            return None
+        target = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return low + (high - low) * (target - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+_histograms = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+def observe(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run.append((name, seconds))
+
+def timed(name):
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def phase(name):
+    return _phase(name) if ENABLED else _NOOP
+
+@contextmanager
+def _phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+def collect(runs):
+    # Also records every observation made on this thread inside the block
+    # as one run appended to runs (a session's list). A nested collect()
+    # keeps its observations to itself, so a fragment's phases aren't
+    # counted again in the full run around it.
+    return _collect(runs) if ENABLED else _NOOP
+
+@contextmanager
+def _collect(runs):
+    outer = getattr(_local, "run", None)
+    _local.run = run = []
+    try:
+        yield
+    finally:
+        _local.run = outer
+        runs.append(run)
+        del runs[:-SESSION_RUNS]
+
+def snapshot():
+    with _lock:
+        return {name: (list(h.counts), h.sum, h.count) for name, h in _histograms.items()}
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def export_text():
+    lines = [f"# HELP {METRIC_NAME} Time spent in each instrumented phase.",
+             f"# TYPE {METRIC_NAME} histogram"]
+    for name, (counts, total, count) in sorted(snapshot().items()):
+        label = f'phase="{_label(name)}"'
+        cumulative = 0
+        for bound, n in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += n
+            lines.append(f'{METRIC_NAME}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f"{METRIC_NAME}_sum{{{label}}} {total:.6f}")
+        lines.append(f"{METRIC_NAME}_count{{{label}}} {count}")
+    return "\n".join(lines) + "\n"
+
+def write_file(path):
+    from storage import atomic_write
+    atomic_write(path, export_text().encode("utf-8"))
+
+def _serve_http(port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = export_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+def _write_periodically(path):
+    while True:
+        time.sleep(FILE_INTERVAL)
+        write_file(path)
+
+_exporting = False
+
+def start_exporters():
+    # Safe to call on every Streamlit run; starts things once per process.
+    global _exporting
+    if not ENABLED:
+        return
+    with _lock:
+        if _exporting:
+            return
+        _exporting = True
+    if METRICS_PORT:
+        _serve_http(int(METRICS_PORT))
+    if METRICS_FILE:
+        threading.Thread(target=_write_periodically, args=(METRICS_FILE,),
+                         name="metrics-file", daemon=True).start()
+
+def show_panel(runs):
+    if not ENABLED:
+        return
+    import streamlit as st
+    with st.sidebar.expander("📈 Metrics"):
+        st.markdown(f"**This session** (last {len(runs)} runs, avg / max)")
+        by_name = {}
+        for run in runs:
+            for name, seconds in run:
+                by_name.setdefault(name, []).append(seconds)
+        for name, times in sorted(by_name.items()):
+            st.write(f"{name}: {sum(times) / len(times) * 1000:.2f} / {max(times) * 1000:.2f} ms")
+        st.markdown("**Process (p50 / p99)**")
+        for name, (counts, total, count) in sorted(snapshot().items()):
+            hist = Histogram()
+            hist.counts, hist.sum, hist.count = counts, total, count
+            st.write(f"{name}: {hist.percentile(0.5) * 1000:.2f} / "
+                     f"{hist.percentile(0.99) * 1000:.2f} ms ({count} calls)")
@@ -0,0 +1,119 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+PLAYER_INDEX_FILE = os.path.join(os.path.dirname(__file__), "data", "players.db")
+
+# Per-player aggregates in exactly the shape get_player_stats() returns,
+# keyed by normalized name. Unlike the leaderboard this grows with the number
+# of players, so it lives in a small SQLite table rather than a JSON file that
+# would be rewritten on every save. "count" in meta is the number of scores
+# folded in, so a fresh or deleted index can be told apart from an empty one.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (key TEXT PRIMARY KEY, stats TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+def normalize_name(name):
+    return name.strip().casefold()
+
+def _fold(stats, entry):
+    if stats is None:
+        stats = {"games": 0, "categories": {}, "total_correct": 0, "total_questions": 0}
+    cat = stats["categories"].setdefault(entry["category"], {"correct": 0, "total": 0, "games": 0})
+    cat["correct"] += entry["score"]
+    cat["total"] += entry["total"]
+    cat["games"] += 1
+    stats["games"] += 1
+    stats["total_correct"] += entry["score"]
+    stats["total_questions"] += entry["total"]
+    return stats
+
+def build(scores):
+    players = {}
+    for entry in scores:
+        key = normalize_name(entry["name"])
+        players[key] = _fold(players.get(key), entry)
+    return players
+
+class PlayerIndex:
+
+    def __init__(self, path=None):
+        self.path = path or PLAYER_INDEX_FILE
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def count(self):
+        row = self._conn().execute("SELECT value FROM meta WHERE name = 'count'").fetchone()
+        return None if row is None else row[0]
+
+    def get(self, name):
+        row = self._conn().execute(
+            "SELECT stats FROM players WHERE key = ?", (normalize_name(name),)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def add(self, entries):
+        conn = self._conn()
+        with conn:
+            for entry in entries:
+                key = normalize_name(entry["name"])
+                row = conn.execute("SELECT stats FROM players WHERE key = ?", (key,)).fetchone()
+                stats = _fold(None if row is None else json.loads(row[0]), entry)
+                conn.execute("INSERT OR REPLACE INTO players (key, stats) VALUES (?, ?)",
+                             (key, json.dumps(stats)))
+            conn.execute(
+                "INSERT INTO meta (name, value) VALUES ('count', ?)"
+                " ON CONFLICT (name) DO UPDATE SET value = value + excluded.value",
+                (len(entries),))
+
+    def rebuild(self, scores):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM players")
+            conn.executemany("INSERT INTO players (key, stats) VALUES (?, ?)",
+                             [(k, json.dumps(v)) for k, v in build(scores).items()])
+            conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('count', ?)",
+                         (len(scores),))
+
+    def clear(self):
+        self.rebuild([])
+
+    def check(self, scores):
+        problems = []
+        if self.count() != len(scores):
+            problems.append(f"index has seen {self.count()} scores, history has {len(scores)}")
+        expected = build(scores)
+        stored = {k: json.loads(v) for k, v in self._conn().execute("SELECT key, stats FROM players")}
+        for key in sorted(set(expected) | set(stored)):
+            if expected.get(key) != stored.get(key):
+                problems.append(f"aggregates for {key!r} differ")
+        return problems
+
+def main(argv):
+    import scoring
+    if len(argv) != 2 or argv[1] not in ("rebuild", "check"):
+        print("usage: python3 player_index.py rebuild|check")
+        return 2
+    if argv[1] == "rebuild":
+        count = scoring.rebuild_player_index()
+        print(f"Rebuilt player index from {count} scores")
+        return 0
+    problems = scoring.check_player_index()
+    for p in problems:
+        print(f"  {p}")
+    print("Player index is consistent" if not problems else "Player index has drifted; run rebuild")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,399 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import unicodedata
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from questions import DIFFICULTIES, get_point_values
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bulk import of questions from CSV or JSON Lines into the bank:
+#
+#   python3 question_import.py new.csv more.jsonl [--into data/questions.json]
+#
+# Sources are read as a stream and handed to a worker pool in chunks of
+# CHUNK rows, with at most IN_FLIGHT chunks per worker outstanding, so
+# memory doesn't grow with the size of the source. Workers validate each row
+# and hash its normalized question and answer; the parent drops rows whose
+# hash is already in the bank or earlier in the import, and spools the rest
+# to one temp file per category. The merged bank is then streamed to a temp
+# file next to the target and renamed over it.
+#
+# CSV sources need a header with category, question, options, answer and
+# points columns (difficulty is optional); options are separated by "|".
+#
+# --near turns on MinHash near-duplicate detection: every question gets a
+# MinHash signature of its word pairs, and LSH bands find earlier questions
+# whose estimated similarity is at least the given threshold. This keeps a
+# signature and its band keys in memory for every question, about 1 KB each,
+# so leave it off for the biggest imports.
+
+CHUNK = 2000
+IN_FLIGHT = 4
+MAX_ERRORS_SHOWN = 10
+MAX_OPEN_SPOOLS = 64
+CSV_OPTION_SEPARATOR = "|"
+REQUIRED = ("category", "question", "options", "answer", "points")
+
+MINHASH_PERMS = 64
+MINHASH_BANDS = 8
+_MASK64 = (1 << 64) - 1
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+# Each permutation is v -> (a * v + b) mod 2**64 with odd a.
+_PERMS = [(_hash64(b"a%d" % i) | 1, _hash64(b"b%d" % i)) for i in range(MINHASH_PERMS)]
+if np is not None:
+    _PERM_A = np.array([a for a, _ in _PERMS], dtype=np.uint64)[:, None]
+    _PERM_B = np.array([b for _, b in _PERMS], dtype=np.uint64)[:, None]
+
+_WORD = re.compile(r"\w+")
+
+def normalize(text):
+    # Case, accents, punctuation and spacing don't make a question new.
+    text = text.casefold()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(_WORD.findall(text))
+
+def text_hash(question, answer):
+    return _hash64(f"{normalize(question)}\0{normalize(answer)}".encode("utf-8"))
+
+def minhash(text):
+    # MINHASH_PERMS 64-bit minimums over the question's word pairs, as bytes.
+    # NumPy does all permutations at once when installed; both paths give
+    # the same signature.
+    words = normalize(text).split()
+    shingles = {" ".join(words[i:i + 2]) for i in range(max(1, len(words) - 1))}
+    values = [_hash64(s.encode("utf-8")) for s in shingles]
+    if np is not None:
+        v = np.array(values, dtype=np.uint64)[None, :]
+        return (_PERM_A * v + _PERM_B).min(axis=1).tobytes()
+    return array("Q", [min([(a * v + b) & _MASK64 for v in values]) for a, b in _PERMS]).tobytes()
+
+def _points(value):
+    # Whole numbers only: 200, "200" or 200.0, but not True, 200.7 or "200.7".
+    if isinstance(value, str):
+        try:
+            value = int(value)
+        except ValueError:
+            value = float(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError
+    return value
+
+def validate(row, point_values):
+    # Returns (category, question) or raises ValueError with the reason.
+    row = {k: v.strip() if isinstance(v, str) else v for k, v in row.items()}
+    missing = [f for f in REQUIRED if row.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    category = row["category"]
+    options = row["options"]
+    if isinstance(options, str):
+        options = options.split(CSV_OPTION_SEPARATOR)
+    if isinstance(options, list):
+        options = [o.strip() if isinstance(o, str) else o for o in options]
+    if not isinstance(category, str) or not isinstance(row["question"], str):
+        raise ValueError("category and question must be text")
+    if not isinstance(options, list) or len(options) < 2 or not all(isinstance(o, str) and o for o in options):
+        raise ValueError("options must be at least two non-empty strings")
+    if len(set(options)) != len(options):
+        raise ValueError("options repeat")
+    answer = row["answer"]
+    if answer not in options:
+        raise ValueError("answer isn't one of the options")
+    try:
+        points = _points(row["points"])
+    except ValueError:
+        raise ValueError(f"points {row['points']!r} isn't a whole number")
+    if points not in point_values:
+        raise ValueError(f"points {points} isn't one of {', '.join(map(str, point_values))}")
+    q = {"question": row["question"], "options": options, "answer": answer, "points": points}
+    difficulty = row.get("difficulty")
+    if difficulty:
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"difficulty {difficulty!r} isn't one of {', '.join(DIFFICULTIES)}")
+        q["difficulty"] = difficulty
+    return category, q
+
+def check_chunk(args):
+    # Runs in a worker. rows are raw JSONL lines or CSV dicts; returns, per
+    # row, (line, None, category, JSON text, hash, signature) or
+    # (line, reason, ...) for rejects.
+    kind, first_line, rows, point_values, near = args
+    results = []
+    for line, row in enumerate(rows, first_line):
+        try:
+            if kind == "jsonl":
+                if not row.strip():
+                    continue
+                try:
+                    row = json.loads(row)
+                except ValueError as e:
+                    raise ValueError(f"not JSON ({e.msg})")
+                if not isinstance(row, dict):
+                    raise ValueError("not a JSON object")
+            category, q = validate(row, point_values)
+        except ValueError as e:
+            results.append((line, str(e), None, None, None, None))
+            continue
+        results.append((line, None, category, json.dumps(q, ensure_ascii=False),
+                        text_hash(q["question"], q["answer"]),
+                        minhash(q["question"]) if near else None))
+    return results
+
+def read_chunks(path, point_values, near):
+    # Yields check_chunk() arguments without holding more than one chunk.
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = [c for c in REQUIRED if c not in (reader.fieldnames or ())]
+            if missing:
+                raise SystemExit(f"{path}: CSV header has no {', '.join(missing)} column")
+            rows, first = [], 2
+            for row in reader:
+                rows.append(row)
+                if len(rows) == CHUNK:
+                    yield ("csv", first, rows, point_values, near)
+                    first = reader.line_num + 1
+                    rows = []
+            if rows:
+                yield ("csv", first, rows, point_values, near)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows, first = [], 1
+            for number, line in enumerate(f, 1):
+                rows.append(line)
+                if len(rows) == CHUNK:
+                    yield ("jsonl", first, rows, point_values, near)
+                    rows, first = [], number + 1
+            if rows:
+                yield ("jsonl", first, rows, point_values, near)
+
+def _bounded_map(pool, func, items, window):
+    # Like pool.map, in order, but never more than window tasks queued.
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+class NearDuplicates:
+    # LSH over MinHash signatures: MINHASH_BANDS bands of equal-size slices;
+    # questions sharing any band are candidates, confirmed by comparing the
+    # whole signature.
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.rows = MINHASH_PERMS // MINHASH_BANDS
+        self.bands = {}
+
+    def _keys(self, sig):
+        size = self.rows * 8
+        return [hash((b, sig[b * size:(b + 1) * size])) for b in range(MINHASH_BANDS)]
+
+    def seen(self, sig):
+        # True if a similar question was added before; otherwise adds this one.
+        keys = self._keys(sig)
+        for key in keys:
+            other = self.bands.get(key)
+            if other is not None:
+                same = sum(a == b for a, b in zip(array("Q", sig), array("Q", other)))
+                if same >= self.threshold * MINHASH_PERMS:
+                    return True
+        for key in keys:
+            self.bands.setdefault(key, sig)
+        return False
+
+class Spool:
+    # New questions, one JSON text per line, in a temp file per category.
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self.categories = {}
+
+    def add(self, category, text):
+        path = self.categories.get(category)
+        if path is None:
+            path = self.categories[category] = os.path.join(self.directory, f"{len(self.categories)}.jsonl")
+        f = self.files.get(category)
+        if f is None:
+            if len(self.files) >= MAX_OPEN_SPOOLS:
+                self.close()
+            f = self.files[category] = open(path, "a", encoding="utf-8")
+        f.write(text + "\n")
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def lines(self, category):
+        path = self.categories.get(category)
+        if path is None:
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+def _existing(path):
+    # (category, question) pairs from the current bank, streamed.
+    import question_stream
+    if not os.path.exists(path):
+        return
+    for category in question_stream.list_categories(path):
+        for q in question_stream.iter_category(path, category):
+            yield category, q
+
+def write_bank(path, spool):
+    # Streams the current bank plus the spooled questions to a temp file and
+    # renames it over path.
+    existing_categories = []
+    if os.path.exists(path):
+        import question_stream
+        existing_categories = question_stream.list_categories(path)
+    categories = existing_categories + [c for c in spool.categories if c not in existing_categories]
+    tmp = f"{path}.{os.getpid()}.import.tmp"
+    count = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            if path.endswith(".jsonl"):
+                for category, q in _existing(path):
+                    out.write(json.dumps({"category": category, **q}, ensure_ascii=False) + "\n")
+                    count += 1
+                for category in spool.categories:
+                    prefix = '{"category": ' + json.dumps(category, ensure_ascii=False) + ", "
+                    for text in spool.lines(category):
+                        out.write(prefix + text[1:] + "\n")
+                        count += 1
+            else:
+                import question_stream
+                out.write("{")
+                for n, category in enumerate(categories):
+                    out.write(("," if n else "") + f"\n  {json.dumps(category, ensure_ascii=False)}: [")
+                    first = True
+                    if category in existing_categories:
+                        for q in question_stream.iter_category(path, category):
+                            out.write(("" if first else ",") + "\n    " + json.dumps(q, ensure_ascii=False))
+                            first = False
+                            count += 1
+                    for text in spool.lines(category):
+                        out.write(("" if first else ",") + "\n    " + text)
+                        first = False
+                        count += 1
+                    out.write("\n  ]")
+                out.write("\n}\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return count
+
+def import_questions(sources, into, near=None, workers=None, dry_run=False, out=sys.stdout):
+    point_values = tuple(get_point_values())
+    stats = Counter()
+    reasons = Counter()
+    errors = []
+    seen = set()
+    similar = NearDuplicates(near) if near else None
+    start = time.perf_counter()
+
+    for category, q in _existing(into):
+        seen.add(text_hash(q["question"], q["answer"]))
+        if similar:
+            similar.seen(minhash(q["question"]))
+        stats["existing"] += 1
+
+    spool_dir = tempfile.mkdtemp(prefix="quiz-import-", dir=os.path.dirname(os.path.abspath(into)))
+    spool = Spool(spool_dir)
+    try:
+        pool = ProcessPoolExecutor(workers) if workers != 1 else None
+        try:
+            for source in sources:
+                chunks = read_chunks(source, point_values, near is not None)
+                results = (_bounded_map(pool, check_chunk, chunks, IN_FLIGHT * (workers or os.cpu_count()))
+                           if pool else map(check_chunk, chunks))
+                for chunk in results:
+                    for line, reason, category, text, digest, sig in chunk:
+                        stats["rows"] += 1
+                        if reason is not None:
+                            stats["invalid"] += 1
+                            reasons[reason] += 1
+                            if len(errors) < MAX_ERRORS_SHOWN:
+                                errors.append(f"{source}:{line}: {reason}")
+                        elif digest in seen:
+                            stats["duplicates"] += 1
+                        elif similar and similar.seen(sig):
+                            stats["near duplicates"] += 1
+                        else:
+                            seen.add(digest)
+                            spool.add(category, text)
+                            stats["added"] += 1
+        finally:
+            if pool:
+                pool.shutdown()
+        spool.close()
+        checked = time.perf_counter() - start
+        total = None
+        if stats["added"] and not dry_run:
+            total = write_bank(into, spool)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+    written = time.perf_counter() - start - checked
+
+    rows = stats["rows"]
+    print(f"Checked {rows:,} rows in {checked:.1f}s ({rows / max(checked, 1e-9):,.0f} rows/s)", file=out)
+    for key in ("added", "duplicates", "near duplicates", "invalid"):
+        if stats[key] or key != "near duplicates" or near:
+            print(f"  {key}: {stats[key]:,}", file=out)
+    for reason, n in reasons.most_common():
+        print(f"    {n:,} × {reason}", file=out)
+    for error in errors:
+        print(f"  {error}", file=out)
+    if total is not None:
+        print(f"Wrote {total:,} questions to {into} in {written:.1f}s", file=out)
+    elif dry_run:
+        print("Dry run, nothing written", file=out)
+    return stats
+
+def main(argv):
+    from questions import DATA_FILE
+    parser = argparse.ArgumentParser(prog="question_import.py",
+                                     description="Validate, dedupe and merge questions into the bank")
+    parser.add_argument("sources", nargs="+", help="CSV or JSON Lines files")
+    parser.add_argument("--into", default=DATA_FILE, help=f"bank to merge into (default {DATA_FILE})")
+    parser.add_argument("--near", type=float, default=None, metavar="SIMILARITY",
+                        help="also drop near duplicates at this estimated similarity (e.g. 0.8)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--dry-run", action="store_true", help="check and report, don't write")
+    args = parser.parse_args(argv[1:])
+    if args.near is not None and not 0 < args.near <= 1:
+        parser.error("--near must be between 0 and 1")
+    stats = import_questions(args.sources, args.into, args.near, args.workers, args.dry_run)
+    return 1 if stats["invalid"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
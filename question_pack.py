@@ -0,0 +1,190 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from questions import DIFFICULTIES, DIFFICULTY_BY_POINTS, question_id
+
+# Layout (all little-endian):
+#   header   MAGIC, version, category count, record count, string count
+#   offsets  string count + 1 u32 offsets into the string blob
+#   records  one fixed-width RECORD per question, grouped by category
+#   ids      one u64 questions.question_id() per record, in record order
+#   blob     utf-8 string data; the first strings are the category names
+MAGIC = b"QPK1"
+VERSION = 3
+HEADER = struct.Struct("<4sHHII")
+# category index, answer index, option count, difficulty (1 + index into
+# DIFFICULTIES, 0 when the question has no difficulty field), points,
+# question string, first option string (options are stored as consecutive
+# strings)
+RECORD = struct.Struct("<HBBBIII")
+OFFSET = struct.Struct("<I")
+QID = struct.Struct("<Q")
+
+def write_pack(data, path):
+    strings = list(data.keys())
+    records = []
+    ids = []
+    for cat_idx, (cat, qs) in enumerate(data.items()):
+        for q in qs:
+            options = list(q["options"])
+            if q["answer"] not in options:
+                raise ValueError(f"answer not in options: {q['question']!r}")
+            question = len(strings)
+            strings.append(q["question"])
+            first_option = len(strings)
+            strings.extend(options)
+            difficulty = q.get("difficulty")
+            records.append(RECORD.pack(
+                cat_idx, options.index(q["answer"]), len(options),
+                DIFFICULTIES.index(difficulty) + 1 if difficulty else 0,
+                q["points"], question, first_option,
+            ))
+            ids.append(QID.pack(question_id(q)))
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for b in encoded:
+        offsets.append(offsets[-1] + len(b))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(data), len(records), len(strings)))
+        f.write(b"".join(OFFSET.pack(o) for o in offsets))
+        f.write(b"".join(records))
+        f.write(b"".join(ids))
+        f.write(b"".join(encoded))
+        f.flush()
+        os.fsync(f.fileno())
+    # Replace rather than rewrite in place: live readers keep their mmap of
+    # the old inode instead of faulting on a truncated file.
+    os.replace(tmp, path)
+    return len(records)
+
+class _PackedQuestion(Mapping):
+    __slots__ = ("_pack", "_index")
+
+    _KEYS = ("question", "options", "answer", "points")
+    _KEYS_WITH_DIFFICULTY = _KEYS + ("difficulty",)
+
+    def __init__(self, pack, index):
+        self._pack = pack
+        self._index = index
+
+    def _keys(self):
+        return self._KEYS_WITH_DIFFICULTY if self._pack._record(self._index)[3] else self._KEYS
+
+    def __getitem__(self, key):
+        _, answer, n_options, difficulty, points, question, first = self._pack._record(self._index)
+        if key == "difficulty" and difficulty:
+            return DIFFICULTIES[difficulty - 1]
+        if key == "question":
+            return self._pack._string(question)
+        if key == "options":
+            return tuple(self._pack._string(first + i) for i in range(n_options))
+        if key == "answer":
+            return self._pack._string(first + answer)
+        if key == "points":
+            return points
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"_PackedQuestion({dict(self)!r})"
+
+class _QuestionSeq(Sequence):
+    __slots__ = ("_pack", "_indices")
+
+    def __init__(self, pack, indices):
+        self._pack = pack
+        self._indices = indices
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [_PackedQuestion(self._pack, j) for j in self._indices[i]]
+        return _PackedQuestion(self._pack, self._indices[i])
+
+    def __len__(self):
+        return len(self._indices)
+
+class PackedQuestionBank:
+    # Same interface as questions.QuestionBank, backed by an mmap of a file
+    # written by write_pack(). Only the fixed-width records are read at load;
+    # question text is decoded when a question's fields are accessed.
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_categories, n_records, n_strings = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} question pack")
+        self._offsets_at = HEADER.size
+        self._records_at = self._offsets_at + OFFSET.size * (n_strings + 1)
+        self._ids_at = self._records_at + RECORD.size * n_records
+        self._blob_at = self._ids_at + QID.size * n_records
+
+        self.categories = tuple(self._string(i) for i in range(n_categories))
+        by_category = [array("I") for _ in range(n_categories)]
+        buckets = {}
+        by_difficulty = {}
+        view = memoryview(self._buf)[self._records_at:self._ids_at]
+        for i, (cat, _, _, difficulty, points, _, _) in enumerate(RECORD.iter_unpack(view)):
+            by_category[cat].append(i)
+            key = (self.categories[cat], points)
+            if key not in buckets:
+                buckets[key] = array("I")
+            buckets[key].append(i)
+            # Same rule as questions.question_difficulty().
+            level = DIFFICULTIES[difficulty - 1] if difficulty else DIFFICULTY_BY_POINTS.get(points)
+            key = (self.categories[cat], level)
+            if key not in by_difficulty:
+                by_difficulty[key] = array("I")
+            by_difficulty[key].append(i)
+        view.release()
+        self._by_category = dict(zip(self.categories, by_category))
+        self._bucket_indices = buckets
+        self._buckets = {key: _QuestionSeq(self, idx) for key, idx in buckets.items()}
+        self._by_difficulty = {key: _QuestionSeq(self, idx) for key, idx in by_difficulty.items()}
+
+    def _record(self, i):
+        return RECORD.unpack_from(self._buf, self._records_at + RECORD.size * i)
+
+    def _string(self, i):
+        at = self._offsets_at + OFFSET.size * i
+        start, = OFFSET.unpack_from(self._buf, at)
+        end, = OFFSET.unpack_from(self._buf, at + OFFSET.size)
+        return self._buf[self._blob_at + start:self._blob_at + end].decode("utf-8")
+
+    def questions(self, category, difficulty=None):
+        if difficulty is None:
+            return tuple(_QuestionSeq(self, self._by_category[category]))
+        return tuple(self._by_difficulty.get((category, difficulty), ()))
+
+    def bucket(self, category, points):
+        return self._buckets.get((category, points), ())
+
+    def bucket_ids(self, category, points):
+        # Read from the ids section, so no question text is decoded.
+        at = self._ids_at
+        return [QID.unpack_from(self._buf, at + QID.size * i)[0]
+                for i in self._bucket_indices.get((category, points), ())]
+
+def main(argv):
+    from questions import DATA_FILE, PACK_FILE
+    src = argv[1] if len(argv) > 1 else DATA_FILE
+    dst = argv[2] if len(argv) > 2 else PACK_FILE
+    with open(src, "r") as f:
+        data = json.load(f)
+    count = write_pack(data, dst)
+    print(f"Wrote {count} questions from {src} to {dst} ({os.path.getsize(dst):,} bytes)")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,275 @@
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from questions import get_bank, get_point_values, question_id
+from timer import QUESTION_TIME_LIMIT
+
+QUESTION_STATS_FILE = os.path.join(os.path.dirname(__file__), "data", "question_stats.db")
+
+# Board selection weighted by how hard each question has turned out to be
+# and how recently it was shown.
+#
+# A question's measured difficulty is a mix of how often it was missed and
+# how long correct answers took, both smoothed towards the difficulty its
+# cell is meant to have (TARGET_EASIEST for the cheapest cell up to
+# TARGET_HARDEST for the dearest) until it has a few results. Its fit for
+# the cell falls off as a Gaussian of the distance between the two, and a
+# recently shown question is scaled down by a factor that recovers with
+# RECENCY_HALF_LIFE.
+#
+# Each (category, points) bucket keeps an alias table built over an upper
+# bound on every question's fit, so drawing a candidate is O(1) however big
+# the pool. The candidate is accepted with probability weight / bound, which
+# also applies the recency factor without touching the table. A new result
+# only updates that question's fit; the table is rebuilt, lazily and for
+# that bucket alone, when a fit outgrows its bound or the bounds have become
+# so loose that too many draws would be rejected.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS question_stats (
+    id INTEGER PRIMARY KEY,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    correct INTEGER NOT NULL DEFAULT 0,
+    timed INTEGER NOT NULL DEFAULT 0,
+    total_time REAL NOT NULL DEFAULT 0,
+    last_shown REAL
+);
+"""
+
+TARGET_EASIEST = 0.15
+TARGET_HARDEST = 0.85
+# Share of the difficulty that comes from answer time rather than misses.
+TIME_SHARE = 0.3
+# Results it takes to move halfway from the prior to the measured value.
+PRIOR_RESULTS = 5
+FIT_WIDTH = 0.15
+FIT_FLOOR = 0.01
+RECENCY_HALF_LIFE = 12 * 3600
+RECENCY_FLOOR = 0.01
+# Bounds are built this far above the current fit so small changes fit.
+BOUND_HEADROOM = 2.0
+# Rebuild a bucket when the fits sum to less than this share of the bounds.
+MIN_ACCEPTANCE = 0.25
+# Draws before falling back to an exact O(bucket) pick.
+MAX_DRAWS = 64
+
+def point_targets(point_values=None):
+    point_values = sorted(point_values or get_point_values())
+    if len(point_values) == 1:
+        return {point_values[0]: (TARGET_EASIEST + TARGET_HARDEST) / 2}
+    step = (TARGET_HARDEST - TARGET_EASIEST) / (len(point_values) - 1)
+    return {pts: TARGET_EASIEST + i * step for i, pts in enumerate(point_values)}
+
+def difficulty(stats, target):
+    # stats: (attempts, correct, timed, total_time, last_shown) or None.
+    if stats is None:
+        return target
+    attempts, correct, timed, total_time = stats[:4]
+    miss_rate = (attempts - correct + PRIOR_RESULTS * target) / (attempts + PRIOR_RESULTS)
+    slowness = min(1.0, (total_time / QUESTION_TIME_LIMIT + PRIOR_RESULTS * target) / (timed + PRIOR_RESULTS))
+    return (1 - TIME_SHARE) * miss_rate + TIME_SHARE * slowness
+
+def fit(stats, target):
+    distance = (difficulty(stats, target) - target) / FIT_WIDTH
+    return max(FIT_FLOOR, math.exp(-0.5 * distance * distance))
+
+def recency(last_shown, now):
+    if last_shown is None:
+        return 1.0
+    age = max(0.0, now - last_shown)
+    return max(RECENCY_FLOOR, 1.0 - 0.5 ** (age / RECENCY_HALF_LIFE))
+
+class AliasTable:
+    # Vose's alias method: O(n) to build, O(1) to draw.
+    __slots__ = ("prob", "alias")
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self.prob = array("d", bytes(8 * n))
+        self.alias = array("l", range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def draw(self, rng):
+        i = int(rng.random() * len(self.prob))
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+class Bucket:
+    __slots__ = ("questions", "ids", "positions", "target", "fits", "bounds", "shown",
+                 "table", "fit_total", "bound_total", "stale")
+
+    def __init__(self, questions, ids, target, stats):
+        # ids come from the bank's bucket_ids(), which packed banks read
+        # without decoding the questions.
+        self.questions = questions
+        self.ids = ids
+        self.positions = {qid: i for i, qid in enumerate(self.ids)}
+        self.target = target
+        self.fits = array("d", (fit(stats.get(qid), target) for qid in self.ids))
+        self.shown = {qid: stats[qid][4] for qid in self.ids if qid in stats and stats[qid][4] is not None}
+        self.rebuild()
+
+    def rebuild(self):
+        self.bounds = array("d", (min(1.0, f * BOUND_HEADROOM) for f in self.fits))
+        self.table = AliasTable(self.bounds)
+        self.fit_total = sum(self.fits)
+        self.bound_total = sum(self.bounds)
+        self.stale = False
+
+    def set_fit(self, i, value):
+        self.fit_total += value - self.fits[i]
+        self.fits[i] = value
+        if value > self.bounds[i] or self.fit_total < MIN_ACCEPTANCE * self.bound_total:
+            self.stale = True
+
+    def weight(self, i, now):
+        return self.fits[i] * recency(self.shown.get(self.ids[i]), now)
+
+    def draw(self, rng, now):
+        if self.stale:
+            self.rebuild()
+        for _ in range(MAX_DRAWS):
+            i = self.table.draw(rng)
+            if rng.random() * self.bounds[i] < self.weight(i, now):
+                return self.questions[i]
+        # Nearly everything here was shown lately; pick exactly instead.
+        weights = [self.weight(i, now) for i in range(len(self.questions))]
+        return rng.choices(self.questions, weights)[0]
+
+def _signed(qid):
+    # SQLite integers are signed 64-bit.
+    return qid - (1 << 64) if qid >= 1 << 63 else qid
+
+class StatsStore:
+
+    def __init__(self, path=None):
+        self.path = path or QUESTION_STATS_FILE
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def load(self):
+        # {question id: (attempts, correct, timed, total_time, last_shown)}
+        rows = self._conn().execute(
+            "SELECT id, attempts, correct, timed, total_time, last_shown FROM question_stats")
+        return {qid & (1 << 64) - 1: tuple(rest) for qid, *rest in rows}
+
+    def record_results(self, results):
+        # results: (question id, correct, seconds or None) tuples.
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO question_stats (id, attempts, correct, timed, total_time) VALUES (?, 1, ?, ?, ?)"
+                " ON CONFLICT(id) DO UPDATE SET attempts = attempts + 1, correct = correct + excluded.correct,"
+                " timed = timed + excluded.timed, total_time = total_time + excluded.total_time",
+                [(_signed(qid), int(correct), int(seconds is not None and correct), seconds if correct and seconds else 0.0)
+                 for qid, correct, seconds in results])
+
+    def record_shown(self, qid, now):
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT INTO question_stats (id, last_shown) VALUES (?, ?)"
+                         " ON CONFLICT(id) DO UPDATE SET last_shown = excluded.last_shown",
+                         (_signed(qid), now))
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM question_stats")
+
+class Selector:
+    # Buckets are built the first time a board needs them and then kept up
+    # to date by observe() and shown().
+
+    def __init__(self, bank, store):
+        self.bank = bank
+        self.store = store
+        self.targets = point_targets()
+        self.stats = {}
+        self.buckets = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _bucket(self, cat, pts):
+        bucket = self.buckets.get((cat, pts))
+        if bucket is None:
+            if not self._loaded:
+                self.stats = self.store.load()
+                self._loaded = True
+            pool = self.bank.bucket(cat, pts)
+            bucket = self.buckets[cat, pts] = (
+                Bucket(pool, self.bank.bucket_ids(cat, pts), self.targets[pts], self.stats) if pool else None)
+        return bucket
+
+    def choose(self, cat, pts, rng=random, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            bucket = self._bucket(cat, pts)
+            return bucket.draw(rng, now) if bucket is not None else None
+
+    def observe(self, cat, q, correct, seconds=None):
+        # Time only counts for correct answers; misses and skips count as
+        # misses.
+        qid = question_id(q)
+        self.store.record_results([(qid, correct, seconds)])
+        with self._lock:
+            attempts, right, timed, total, last_shown = self.stats.get(qid) or (0, 0, 0, 0.0, None)
+            if correct and seconds is not None:
+                timed += 1
+                total += seconds
+            self.stats[qid] = (attempts + 1, right + int(correct), timed, total, last_shown)
+            bucket = self.buckets.get((cat, q["points"]))
+            i = bucket.positions.get(qid) if bucket is not None else None
+            if i is not None:
+                bucket.set_fit(i, fit(self.stats[qid], bucket.target))
+
+    def shown(self, cat, q, now=None):
+        now = time.time() if now is None else now
+        qid = question_id(q)
+        self.store.record_shown(qid, now)
+        with self._lock:
+            stats = self.stats.get(qid) or (0, 0, 0, 0.0, None)
+            self.stats[qid] = stats[:4] + (now,)
+            bucket = self.buckets.get((cat, q["points"]))
+            if bucket is not None and qid in bucket.positions:
+                bucket.shown[qid] = now
+
+_store = None
+_selector = None
+_selector_lock = threading.Lock()
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = StatsStore()
+    return _store
+
+def get_selector():
+    # One per process, replaced when the question bank changes.
+    global _selector
+    bank = get_bank()
+    with _selector_lock:
+        if _selector is None or _selector.bank is not bank or _selector.store is not get_store():
+            _selector = Selector(bank, get_store())
+        return _selector
@@ -0,0 +1,240 @@
+import json
+import os
+import re
+
+CHUNK_SIZE = 1 << 16
+
+# Skipping runs in the regex engine rather than a Python loop. _RUN consumes
+# text up to the next bracket that isn't part of a complete string, flat
+# array, or object holding flat arrays (which covers a whole question), so the
+# loop in _skip_container only wakes up at category boundaries. Written as
+# unrolled loops so a match cut off by the end of the buffer backtracks in
+# linear time.
+_S = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_N = r'[^"\[\]{}]*'
+_A = rf'\[{_N}(?:{_S}{_N})*\]'
+_O = rf'\{{{_N}(?:(?:{_S}|{_A}){_N})*\}}'
+_RUN = re.compile(rf'{_N}(?:(?:{_S}|{_A}|{_O}){_N})*'.encode(), re.S)
+_CONTAINER = re.compile(rf'{_O}|{_A}'.encode(), re.S)
+_STRING = re.compile(_S.encode(), re.S)
+_WS = re.compile(rb"\s*")
+_SCALAR_END = re.compile(rb"[,\]}\s]")
+_JSONL_CATEGORY = re.compile(rf'"category"\s*:\s*({_S})'.encode())
+
+class _Scanner:
+    # Walks a JSON document in fixed-size binary chunks. Values can be
+    # skipped without being built; only the bytes between the start of a
+    # captured value and pos are kept around while it is being read.
+
+    def __init__(self, f):
+        self.f = f
+        self.base = f.tell()
+        self.buf = b""
+        self.pos = 0
+        self.mark_at = None
+
+    def offset(self):
+        return self.base + self.pos
+
+    def _fill(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            return False
+        keep = self.pos if self.mark_at is None else self.mark_at
+        self.buf = self.buf[keep:] + chunk
+        self.base += keep
+        self.pos -= keep
+        if self.mark_at is not None:
+            self.mark_at = 0
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos:self.pos + 1]
+            if not self._fill():
+                return b""
+
+    def expect(self, chars):
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"expected one of {chars!r}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def string(self):
+        if self.peek() != b'"':
+            raise ValueError("expected a string")
+        while True:
+            m = _STRING.match(self.buf, self.pos)
+            if m:
+                self.pos = m.end()
+                return json.loads(m.group())
+            if not self._fill():
+                raise ValueError("unterminated string")
+
+    def skip_value(self):
+        c = self.peek()
+        if c == b'"':
+            self.string()
+        elif c and c in b"[{":
+            self._skip_container()
+        else:
+            while True:
+                m = _SCALAR_END.search(self.buf, self.pos)
+                if m:
+                    self.pos = m.start()
+                    return
+                self.pos = len(self.buf)
+                if not self._fill():
+                    return
+
+    def _skip_container(self):
+        m = _CONTAINER.match(self.buf, self.pos)
+        if m:
+            self.pos = m.end()
+            return
+        depth = 0
+        while True:
+            if depth:
+                self.pos = _RUN.match(self.buf, self.pos).end()
+            if self.pos >= len(self.buf) or self.buf[self.pos] == ord('"'):
+                if not self._fill():
+                    raise ValueError("unexpected end of document")
+                continue
+            if self.buf[self.pos] in b"[{":
+                depth += 1
+            else:
+                depth -= 1
+            self.pos += 1
+            if depth == 0:
+                return
+
+    def value(self):
+        self.peek()
+        self.mark_at = self.pos
+        try:
+            self.skip_value()
+            return json.loads(self.buf[self.mark_at:self.pos])
+        finally:
+            self.mark_at = None
+
+    def members(self):
+        # Yields each top-level key and the file offset of its value, with the
+        # scanner positioned at that value. The caller either consumes the
+        # value or leaves it to be skipped.
+        self.expect(b"{")
+        if self.peek() == b"}":
+            return
+        while True:
+            key = self.string()
+            self.expect(b":")
+            self.peek()
+            start = self.offset()
+            yield key, start
+            if self.offset() == start:
+                self.skip_value()
+            if self.expect(b",}") == b"}":
+                return
+
+    def items(self):
+        self.expect(b"[")
+        if self.peek() == b"]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(b",]") == b"]":
+                return
+
+def _is_jsonl(path):
+    return path.endswith(".jsonl")
+
+def _jsonl_lines(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield line
+
+def _jsonl_category(line):
+    m = _JSONL_CATEGORY.search(line)
+    return json.loads(m.group(1)) if m else json.loads(line)["category"]
+
+def _index_path(path):
+    return path + ".idx"
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def _read_index(path):
+    try:
+        with open(_index_path(path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("stamp") != _stamp(path):
+        return None
+    return index["categories"]
+
+def _write_index(path, stamp, categories):
+    tmp = _index_path(path) + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stamp": stamp, "categories": categories}, f)
+        os.replace(tmp, _index_path(path))
+    except OSError:
+        pass
+
+def _scan_categories(path):
+    stamp = _stamp(path)
+    categories = []
+    with open(path, "rb") as f:
+        if _is_jsonl(path):
+            seen = set()
+            for line in _jsonl_lines(f):
+                cat = _jsonl_category(line)
+                if cat not in seen:
+                    seen.add(cat)
+                    categories.append([cat, None])
+        else:
+            for key, offset in _Scanner(f).members():
+                categories.append([key, offset])
+    _write_index(path, stamp, categories)
+    return categories
+
+def _categories(path):
+    # [name, offset] pairs. Offsets point at each category's array in a JSON
+    # file and are None for JSON Lines, where categories are interleaved.
+    # Cached in a sidecar .idx file so repeat runs skip the scan.
+    categories = _read_index(path)
+    if categories is None:
+        categories = _scan_categories(path)
+    return categories
+
+def list_categories(path):
+    return [name for name, _ in _categories(path)]
+
+def iter_category(path, category):
+    offsets = dict(_categories(path))
+    if category not in offsets:
+        return
+    with open(path, "rb") as f:
+        if _is_jsonl(path):
+            for line in _jsonl_lines(f):
+                if _jsonl_category(line) == category:
+                    q = json.loads(line)
+                    del q["category"]
+                    yield q
+        else:
+            f.seek(offsets[category])
+            yield from _Scanner(f).items()
+
+def load_jsonl(path):
+    data = {}
+    with open(path, "rb") as f:
+        for line in _jsonl_lines(f):
+            q = json.loads(line)
+            data.setdefault(q.pop("category"), []).append(q)
+    return data
@@ -1,40 +1,299 @@
-import json
+import marshal
 import random
 import os
+import threading
+import metrics
+from types import MappingProxyType
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), "data", "questions.json")
+PACK_FILE = os.path.join(os.path.dirname(__file__), "data", "questions.qpk")
+JSONL_FILE = os.path.join(os.path.dirname(__file__), "data", "questions.jsonl")
+# Parsed copy of the text source, in marshal format, so repeat starts skip
+# JSON parsing. Keyed by the source's SHA-256; the mtime/size stamp is only a
+# shortcut to avoid hashing when nothing has touched the file.
+SNAPSHOT_FILE = os.path.join(os.path.dirname(__file__), "data", "questions.snapshot")
+SNAPSHOT_VERSION = 1
+# The CLI streams sources bigger than this instead of snapshotting them.
+SNAPSHOT_MAX_BYTES = 64 * 1024 * 1024
 
+DIFFICULTIES = ("easy", "medium", "hard")
+# Used when a question has no "difficulty" field of its own.
+DIFFICULTY_BY_POINTS = {200: "easy", 400: "easy", 600: "medium", 800: "hard", 1000: "hard"}
+
+def question_id(q):
+    # Stable 64-bit id from the question text, for logs that outlive edits
+    # to the bank's ordering.
+    import hashlib
+    return int.from_bytes(hashlib.blake2b(q["question"].encode("utf-8"), digest_size=8).digest(), "little")
+
+def question_difficulty(q):
+    return q.get("difficulty") or DIFFICULTY_BY_POINTS.get(q["points"])
+
+def _text_source():
+    if not os.path.exists(DATA_FILE) and os.path.exists(JSONL_FILE):
+        return JSONL_FILE
+    return DATA_FILE
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def _sha256(data):
+    import hashlib
+    return hashlib.sha256(data).hexdigest()
+
+def _write_snapshot(snap):
+    from storage import atomic_write
+    try:
+        atomic_write(SNAPSHOT_FILE, marshal.dumps(snap))
+    except OSError:
+        pass
+
+# The last snapshot loaded, as (source, stamp, snapshot), so repeat calls
+# in one process don't read and unmarshal it again. Every caller shares it,
+# so its questions are frozen the same way QuestionBank's are.
+_loaded = (None, None, None)
+
+def _remember(path, snap):
+    global _loaded
+    frozen = {cat: tuple(_freeze_question(q) for q in qs) for cat, qs in snap["data"].items()}
+    snap = dict(snap, data=MappingProxyType(frozen))
+    _loaded = (path, snap["stamp"], snap)
+    return snap
+
+def _read_snapshot(path):
+    stamp = _file_stamp(path)
+    loaded_path, loaded_stamp, snap = _loaded
+    if loaded_path == path and loaded_stamp == stamp:
+        return snap
+    try:
+        # marshal.loads on the whole file; marshal.load on a file object
+        # reads it in tiny pieces and is slower than parsing the JSON.
+        with open(SNAPSHOT_FILE, "rb") as f:
+            snap = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(snap, dict) or snap.get("version") != SNAPSHOT_VERSION or snap.get("source") != path:
+        return None
+    if snap["stamp"] == stamp:
+        return _remember(path, snap)
+    with open(path, "rb") as f:
+        digest = _sha256(f.read())
+    if digest != snap["sha256"]:
+        return None
+    # Touched but not changed: keep it, with the new stamp.
+    snap["stamp"] = stamp
+    _write_snapshot(snap)
+    return _remember(path, snap)
+
+def _difficulty_index(data):
+    # {category: {difficulty: [positions in data[category]]}}
+    index = {}
+    for cat, qs in data.items():
+        by_difficulty = index[cat] = {}
+        for i, q in enumerate(qs):
+            by_difficulty.setdefault(question_difficulty(q), []).append(i)
+    return index
+
+def _parse_and_snapshot(path):
+    stamp = _file_stamp(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path == JSONL_FILE:
+        import question_stream
+        data = question_stream.load_jsonl(path)
+    else:
+        import json
+        data = json.loads(raw)
+    snap = {
+        "version": SNAPSHOT_VERSION,
+        "source": path,
+        "stamp": stamp,
+        "sha256": _sha256(raw),
+        "data": data,
+        "difficulty": _difficulty_index(data),
+    }
+    _write_snapshot(snap)
+    return _remember(path, snap)
+
+@metrics.timed("questions.load_questions")
 def load_questions():
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    path = _text_source()
+    snap = _read_snapshot(path)
+    if snap is None:
+        snap = _parse_and_snapshot(path)
+    return snap["data"]
+
+def _freeze_question(q):
+    if isinstance(q, MappingProxyType):
+        return q
+    frozen = dict(q)
+    frozen["options"] = tuple(q["options"])
+    return MappingProxyType(frozen)
+
+class QuestionBank:
+    # Read-only view of a question file. Questions are handed out as
+    # mappingproxy objects inside tuples so callers can't mutate the
+    # shared copy; anything that wants to reorder must copy first.
+
+    def __init__(self, data):
+        self._questions = {
+            cat: tuple(_freeze_question(q) for q in qs)
+            for cat, qs in data.items()
+        }
+        self.categories = tuple(self._questions)
+        buckets = {}
+        by_difficulty = {}
+        for cat, qs in self._questions.items():
+            for q in qs:
+                buckets.setdefault((cat, q["points"]), []).append(q)
+                by_difficulty.setdefault((cat, question_difficulty(q)), []).append(q)
+        self._buckets = {key: tuple(qs) for key, qs in buckets.items()}
+        self._by_difficulty = {key: tuple(qs) for key, qs in by_difficulty.items()}
+        self._bucket_ids = {}
+
+    def questions(self, category, difficulty=None):
+        if difficulty is None:
+            return self._questions[category]
+        return self._by_difficulty.get((category, difficulty), ())
+
+    def bucket(self, category, points):
+        return self._buckets.get((category, points), ())
+
+    def bucket_ids(self, category, points):
+        # question_id() of each question in bucket(), in the same order.
+        ids = self._bucket_ids.get((category, points))
+        if ids is None:
+            ids = self._bucket_ids[category, points] = [question_id(q) for q in self.bucket(category, points)]
+        return ids
+
+_bank = None
+_bank_stamp = None
+_bank_lock = threading.Lock()
+
+def _bank_source():
+    # Prefer the packed file built by question_pack.py, unless the JSON has
+    # been edited since it was built.
+    source = _text_source()
+    if os.path.exists(PACK_FILE):
+        if not os.path.exists(source):
+            return PACK_FILE
+        if os.stat(PACK_FILE).st_mtime_ns >= os.stat(source).st_mtime_ns:
+            return PACK_FILE
+    return source
+
+def _open_bank(path):
+    if path == PACK_FILE:
+        from question_pack import PackedQuestionBank
+        try:
+            return PackedQuestionBank(path)
+        except ValueError:
+            # Written by an older question_pack.py; use the text source
+            # until it's rebuilt.
+            pass
+    return QuestionBank(load_questions())
+
+def get_bank():
+    global _bank, _bank_stamp
+    path = _bank_source()
+    stamp = (path,) + _file_stamp(path)
+    if _bank is not None and stamp == _bank_stamp:
+        return _bank
+    with _bank_lock:
+        if _bank is None or stamp != _bank_stamp:
+            _bank = _open_bank(path)
+            _bank_stamp = stamp
+        return _bank
 
 def get_categories():
-    data = load_questions()
-    return list(data.keys())
+    return list(get_bank().categories)
 
 def get_point_values():
     return [200, 400, 600, 800, 1000]
 
+_id_index = (None, None)
+
+def question_by_id(qid, bank=None):
+    global _id_index
+    bank = bank or get_bank()
+    indexed_bank, index = _id_index
+    if indexed_bank is not bank:
+        index = {question_id(q): q for cat in bank.categories for q in bank.questions(cat)}
+        _id_index = (bank, index)
+    return index.get(qid)
+
+def get_difficulties():
+    return list(DIFFICULTIES)
+
+@metrics.timed("questions.get_questions")
 def get_questions(category, difficulty=None):
-    data = load_questions()
-    questions = data[category]
-    if difficulty:
-        questions = [q for q in questions if q.get("difficulty") == difficulty]
+    questions = list(get_bank().questions(category, difficulty))
+    random.shuffle(questions)
+    return questions
+
+def _cli_snapshot(path):
+    # The snapshot for a text source, built on first use unless the source is
+    # big enough that reading one category at a time is cheaper.
+    snap = _read_snapshot(path)
+    if snap is None and os.path.getsize(path) <= SNAPSHOT_MAX_BYTES:
+        snap = _parse_and_snapshot(path)
+    return snap
+
+def stream_categories():
+    # Like get_categories(), but for one-off callers such as the CLI that
+    # shouldn't pay for building the whole bank.
+    path = _bank_source()
+    if path == PACK_FILE:
+        return get_categories()
+    snap = _cli_snapshot(path)
+    if snap is not None:
+        return list(snap["data"])
+    import question_stream
+    return question_stream.list_categories(path)
+
+def stream_questions(category, difficulty=None):
+    path = _bank_source()
+    if path == PACK_FILE:
+        return get_questions(category, difficulty)
+    snap = _cli_snapshot(path)
+    if snap is not None:
+        qs = snap["data"].get(category, [])
+        if difficulty is None:
+            questions = list(qs)
+        else:
+            questions = [qs[i] for i in snap["difficulty"].get(category, {}).get(difficulty, ())]
+    else:
+        import question_stream
+        questions = question_stream.iter_category(path, category)
+        if difficulty:
+            questions = (q for q in questions if question_difficulty(q) == difficulty)
+        questions = list(questions)
     random.shuffle(questions)
     return questions
 
-def build_board():
-    data = load_questions()
-    categories = list(data.keys())
+@metrics.timed("questions.build_board")
+def build_board(bank=None, selector=None, rng=random):
+    # Uniform within each (category, points) pool, or weighted by a
+    # question_stats.Selector when one is given. The selector draws from
+    # its own bank, so a different bank alongside it is an error.
+    if selector is not None:
+        if bank is not None and bank is not selector.bank:
+            raise ValueError("selector was built for a different question bank")
+        bank = selector.bank
+    bank = bank or get_bank()
     point_values = get_point_values()
     board = {}
 
-    for cat in categories:
+    for cat in bank.categories:
         board[cat] = {}
         for pts in point_values:
-            pool = [q for q in data[cat] if q["points"] == pts]
-            random.shuffle(pool)
+            if selector is not None:
+                q = selector.choose(cat, pts, rng)
+                if q is not None:
+                    board[cat][pts] = q
+                continue
+            pool = bank.bucket(cat, pts)
             if pool:
-                board[cat][pts] = pool[0]
+                board[cat][pts] = rng.choice(pool)
 
     return board
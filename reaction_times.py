@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+from array import array
+from player_index import normalize_name
+
+REACTION_FILE = os.path.join(os.path.dirname(__file__), "data", "reaction.db")
+
+# Answer latencies as fixed-bucket histograms, one per (player, category,
+# point value), so a player's footprint stays the same however many answers
+# they give. Buckets are 0.1s wide up to FINE_LIMIT, 0.5s wide up to
+# MAX_TIME, and the last one holds everything slower.
+FINE_WIDTH = 0.1
+FINE_LIMIT = 10.0
+COARSE_WIDTH = 0.5
+MAX_TIME = 30.0
+N_FINE = int(round(FINE_LIMIT / FINE_WIDTH))
+N_BUCKETS = N_FINE + int(round((MAX_TIME - FINE_LIMIT) / COARSE_WIDTH)) + 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reaction (
+    key TEXT NOT NULL,
+    category TEXT NOT NULL,
+    points INTEGER NOT NULL,
+    counts BLOB NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (key, category, points)
+);
+"""
+
+def bucket_of(seconds):
+    if seconds < FINE_LIMIT:
+        return max(0, int(seconds / FINE_WIDTH))
+    if seconds < MAX_TIME:
+        return N_FINE + int((seconds - FINE_LIMIT) / COARSE_WIDTH)
+    return N_BUCKETS - 1
+
+def bucket_bounds(i):
+    if i < N_FINE:
+        return i * FINE_WIDTH, (i + 1) * FINE_WIDTH
+    if i < N_BUCKETS - 1:
+        low = FINE_LIMIT + (i - N_FINE) * COARSE_WIDTH
+        return low, low + COARSE_WIDTH
+    return MAX_TIME, MAX_TIME
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self, counts=None, total=0.0):
+        self.counts = counts if counts is not None else array("I", bytes(4 * N_BUCKETS))
+        self.count = sum(self.counts)
+        self.total = total
+
+    @classmethod
+    def from_blob(cls, blob, total):
+        counts = array("I")
+        counts.frombytes(blob)
+        return cls(counts, total)
+
+    def to_blob(self):
+        return self.counts.tobytes()
+
+    def add(self, seconds):
+        self.counts[bucket_of(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        # Interpolated within the bucket; accurate to the bucket width.
+        if not self.count:
+            return None
+        target = p * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= target:
+                low, high = bucket_bounds(i)
+                return low + (high - low) * max(0.0, target - seen) / n
+            seen += n
+        return MAX_TIME
+
+def summarize(histograms):
+    # histograms: {(category, points): LatencyHistogram} -> plain dict in the
+    # shape display.show_player_stats() and the app print.
+    if not histograms:
+        return None
+    overall = LatencyHistogram()
+    by_category = {}
+    by_points = {}
+    for (cat, pts), hist in histograms.items():
+        overall.merge(hist)
+        by_category.setdefault(cat, LatencyHistogram()).merge(hist)
+        by_points.setdefault(pts, LatencyHistogram()).merge(hist)
+
+    def stats(hist):
+        return {"answers": hist.count, "median": hist.percentile(0.5),
+                "p90": hist.percentile(0.9), "mean": hist.mean()}
+
+    result = stats(overall)
+    result["categories"] = {cat: stats(h) for cat, h in by_category.items()}
+    result["points"] = {pts: stats(h) for pts, h in sorted(by_points.items())}
+    return result
+
+class ReactionStore:
+
+    def __init__(self, path=None):
+        self.path = path or REACTION_FILE
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def record_many(self, answers):
+        # answers: (name, category, points, seconds) tuples.
+        grouped = {}
+        for name, cat, pts, seconds in answers:
+            key = (normalize_name(name), cat, pts)
+            grouped.setdefault(key, []).append(seconds)
+        conn = self._conn()
+        with conn:
+            for key, times in grouped.items():
+                row = conn.execute(
+                    "SELECT counts, total FROM reaction WHERE key = ? AND category = ? AND points = ?",
+                    key).fetchone()
+                hist = LatencyHistogram() if row is None else LatencyHistogram.from_blob(*row)
+                for seconds in times:
+                    hist.add(seconds)
+                conn.execute("INSERT OR REPLACE INTO reaction VALUES (?, ?, ?, ?, ?)",
+                             key + (hist.to_blob(), hist.total))
+
+    def histograms(self, name):
+        rows = self._conn().execute(
+            "SELECT category, points, counts, total FROM reaction WHERE key = ?",
+            (normalize_name(name),))
+        return {(cat, pts): LatencyHistogram.from_blob(blob, total)
+                for cat, pts, blob, total in rows}
+
+    def summary(self, name):
+        return summarize(self.histograms(name))
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM reaction")
+
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = ReactionStore()
+    return _store
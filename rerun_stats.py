@@ -0,0 +1,65 @@
+import os
+import time
+from contextlib import contextmanager
+import streamlit as st
+
+# Opt-in with QUIZ_RERUN_STATS=1: times each script or fragment run and
+# counts the delta messages it sends to the browser, so full reruns and
+# fragment reruns can be compared on a real game.
+ENABLED = os.environ.get("QUIZ_RERUN_STATS") == "1"
+MAX_RUNS = 500
+
+def _script_run_ctx():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx()
+
+@contextmanager
+def measure(kind):
+    # Measurements nest: a fragment executing as part of a full run is
+    # recorded on its own as well as counting towards the full run, which
+    # shows what a fragment-only rerun of the same area costs.
+    ctx = _script_run_ctx() if ENABLED else None
+    if ctx is None:
+        yield
+        return
+
+    deltas = 0
+    enqueue = ctx.enqueue
+
+    def counting_enqueue(msg):
+        nonlocal deltas
+        if msg.HasField("delta"):
+            deltas += 1
+        enqueue(msg)
+
+    ctx.enqueue = counting_enqueue
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        ctx.enqueue = enqueue
+        runs = st.session_state.setdefault("rerun_stats", [])
+        runs.append((kind, elapsed, deltas))
+        del runs[:-MAX_RUNS]
+
+def summary(runs):
+    by_kind = {}
+    for kind, elapsed, deltas in runs:
+        count, total_time, total_deltas = by_kind.get(kind, (0, 0.0, 0))
+        by_kind[kind] = (count + 1, total_time + elapsed, total_deltas + deltas)
+    return {
+        kind: {
+            "runs": count,
+            "avg_ms": total_time / count * 1000,
+            "avg_deltas": total_deltas / count,
+        }
+        for kind, (count, total_time, total_deltas) in by_kind.items()
+    }
+
+def show_panel():
+    if not ENABLED:
+        return
+    with st.sidebar.expander("⏱️ Rerun stats"):
+        for kind, s in summary(st.session_state.get("rerun_stats", [])).items():
+            st.write(f"**{kind}** — {s['runs']} runs, {s['avg_ms']:.1f} ms, {s['avg_deltas']:.0f} deltas avg")
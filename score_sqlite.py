@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import sys
+import threading
+import leaderboard
+import player_index
+from scoring import DATA_DIR, INDEX_LOCK_FILE, ScoreStore, JsonScoreStore, _name_key, derived_path
+from storage import file_lock
+
+DB_FILE = os.path.join(DATA_DIR, "scores.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scores_score ON scores (score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_scores_name_key ON scores (name_key);
+CREATE INDEX IF NOT EXISTS idx_scores_category_date ON scores (category, date);
+"""
+
+# Bumped whenever the name_key normalization changes; older databases get
+# their keys recomputed when opened.
+KEY_VERSION = 1
+
+COLUMNS = ("name", "score", "total", "category", "date")
+
+def _row_to_entry(row):
+    return dict(zip(COLUMNS, row))
+
+class SqliteScoreStore(ScoreStore):
+    # One connection per thread; Streamlit serves sessions from a pool.
+
+    def __init__(self, path=None):
+        self.path = path or DB_FILE
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+                self._rekey(conn)
+            self._local.conn = conn
+        return conn
+
+    def _rekey(self, conn):
+        with conn:
+            rows = conn.execute("SELECT id, name FROM scores").fetchall()
+            conn.executemany("UPDATE scores SET name_key = ? WHERE id = ?",
+                             [(_name_key(name), id_) for id_, name in rows])
+            conn.execute(f"PRAGMA user_version = {KEY_VERSION}")
+
+    def save_many(self, entries):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO scores (name, name_key, score, total, category, date)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(e["name"], _name_key(e["name"]), e["score"], e["total"],
+                  e["category"], e["date"]) for e in entries],
+            )
+
+    def load(self):
+        rows = self._conn().execute(
+            "SELECT name, score, total, category, date FROM scores ORDER BY id")
+        return [_row_to_entry(r) for r in rows]
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM scores")
+
+    def top(self, limit):
+        # Ties keep insertion order, matching the stable sort in ScoreStore.
+        rows = self._conn().execute(
+            "SELECT name, score, total, category, date FROM scores"
+            " ORDER BY score DESC, id LIMIT ?", (limit,))
+        return [_row_to_entry(r) for r in rows]
+
+    def player_stats(self, name):
+        # Categories come back in order of the player's first game in each,
+        # which is the key order the scan in aggregate_stats() produces.
+        rows = self._conn().execute(
+            "SELECT category, SUM(score), SUM(total), COUNT(*) FROM scores"
+            " WHERE name_key = ? GROUP BY category ORDER BY MIN(id)",
+            (_name_key(name),)).fetchall()
+        if not rows:
+            return None
+        stats = {"games": 0, "categories": {}}
+        total_correct = 0
+        total_questions = 0
+        for cat, correct, total, games in rows:
+            stats["categories"][cat] = {"correct": correct, "total": total, "games": games}
+            stats["games"] += games
+            total_correct += correct
+            total_questions += total
+        stats["total_correct"] = total_correct
+        stats["total_questions"] = total_questions
+        return stats
+
+def import_json(store, append=False):
+    if store.count() and not append:
+        raise SystemExit(f"{store.path} already has scores; pass --append to add to them")
+    entries = JsonScoreStore().load()
+    # The SQLite backend's leaderboard and player index are rebuilt from the
+    # result, so they match the store whichever backend is active now.
+    with file_lock(INDEX_LOCK_FILE):
+        store.save_many(entries)
+        scores = store.load()
+        leaderboard.save(leaderboard.build(scores), derived_path(leaderboard.LEADERBOARD_FILE, "sqlite"))
+        player_index.PlayerIndex(derived_path(player_index.PLAYER_INDEX_FILE, "sqlite")).rebuild(scores)
+    return len(entries)
+
+def main(argv):
+    if len(argv) < 2 or argv[1] != "import":
+        print("usage: python3 score_sqlite.py import [--append]")
+        return 2
+    store = SqliteScoreStore()
+    count = import_json(store, append="--append" in argv)
+    print(f"Imported {count} scores into {store.path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,36 +1,78 @@
+import abc
+import atexit
 import json
 import os
+import threading
+import time
+import uuid
 from datetime import datetime
+import leaderboard
+import metrics
+import player_index
+from player_index import PlayerIndex, normalize_name
+from storage import file_lock, atomic_write, atomic_write_json, append_durable
 
-SCORES_FILE = os.path.join(os.path.dirname(__file__), "data", "scores.json")
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+# Legacy single-file store, migrated into the snapshot on first use.
+SCORES_FILE = os.path.join(DATA_DIR, "scores.json")
+# Scores are kept as a snapshot plus an append-only log of newer entries.
+# Each log starts with a header line naming it; the snapshot records the last
+# log it absorbed, so a compaction interrupted before the log was swapped out
+# can't count entries twice. The header also records how many scores came
+# before the log ("base"), so the total is known without reading the snapshot.
+SNAPSHOT_FILE = os.path.join(DATA_DIR, "scores.snapshot.json")
+LOG_FILE = os.path.join(DATA_DIR, "scores.log")
+LOCK_FILE = os.path.join(DATA_DIR, "scores.lock")
+# Held across a save and the matching update of the derived indexes, so the
+# indexes see saves in the same order as the store.
+INDEX_LOCK_FILE = os.path.join(DATA_DIR, "scores.index.lock")
+COMPACT_BYTES = 256 * 1024
+# Saves from every session in the process are gathered for this long and
+# written as one batch.
+FLUSH_INTERVAL = 0.05
+# "json" (the files above) or "sqlite" (see score_sqlite.py).
+SCORE_BACKEND = os.environ.get("QUIZ_SCORE_BACKEND", "json")
 
-def load_scores():
-    if not os.path.exists(SCORES_FILE):
-        return []
-    with open(SCORES_FILE, "r") as f:
-        return json.load(f)
+_compacting = threading.Lock()
 
-def save_score(name, score, total, category):
-    scores = load_scores()
-    scores.append({
-        "name": name,
-        "score": score,
-        "total": total,
-        "category": category,
-        "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-    })
-    with open(SCORES_FILE, "w") as f:
-        json.dump(scores, f, indent=2)
+def _read_snapshot():
+    if os.path.exists(SNAPSHOT_FILE):
+        with open(SNAPSHOT_FILE, "r") as f:
+            snapshot = json.load(f)
+        return snapshot["scores"], snapshot.get("absorbed")
+    if os.path.exists(SCORES_FILE):
+        with open(SCORES_FILE, "r") as f:
+            return json.load(f), None
+    return [], None
 
-def get_top_scores(limit=5):
-    scores = load_scores()
-    scores.sort(key=lambda s: s["score"], reverse=True)
-    return scores[:limit]
+def _read_log():
+    if not os.path.exists(LOG_FILE):
+        return None, []
+    log_id = None
+    entries = []
+    with open(LOG_FILE, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A write cut short by a crash; everything before it is intact.
+                continue
+            if "log" in record:
+                log_id = record["log"]
+            else:
+                entries.append(record)
+    return log_id, entries
 
-def get_player_stats(name):
-    scores = load_scores()
-    player_scores = [s for s in scores if s["name"].lower() == name.lower()]
+def _start_log(base=None):
+    header = {"log": uuid.uuid4().hex}
+    if base is not None:
+        header["base"] = base
+    atomic_write(LOG_FILE, (json.dumps(header) + "\n").encode("utf-8"))
+
+def _name_key(name):
+    return normalize_name(name)
 
+def aggregate_stats(player_scores):
     if not player_scores:
         return None
 
@@ -52,3 +94,328 @@ def get_player_stats(name):
     stats["total_questions"] = total_questions
 
     return stats
+
+class ScoreStore(abc.ABC):
+    # Storage interface behind the module-level functions. top() and
+    # player_stats() fall back to scanning load(); backends with indexes
+    # should override them.
+
+    @abc.abstractmethod
+    def save_many(self, entries):
+        pass
+
+    @abc.abstractmethod
+    def load(self):
+        pass
+
+    @abc.abstractmethod
+    def clear(self):
+        pass
+
+    def top(self, limit):
+        scores = self.load()
+        scores.sort(key=lambda s: s["score"], reverse=True)
+        return scores[:limit]
+
+    def player_stats(self, name):
+        key = _name_key(name)
+        return aggregate_stats([s for s in self.load() if _name_key(s["name"]) == key])
+
+    def count(self):
+        # None when the store can't tell without loading every score.
+        return None
+
+class JsonScoreStore(ScoreStore):
+
+    def load(self):
+        with file_lock(LOCK_FILE, shared=True):
+            scores, absorbed = _read_snapshot()
+            log_id, entries = _read_log()
+        if log_id is None or log_id != absorbed:
+            scores.extend(entries)
+        return scores
+
+    def compact(self):
+        with file_lock(LOCK_FILE):
+            scores, absorbed = _read_snapshot()
+            log_id, entries = _read_log()
+            if log_id is not None and log_id != absorbed:
+                scores.extend(entries)
+            atomic_write_json(SNAPSHOT_FILE, {"absorbed": log_id, "scores": scores})
+            _start_log(len(scores))
+            if os.path.exists(SCORES_FILE):
+                os.remove(SCORES_FILE)
+
+    def _compact_in_background(self):
+        if not _compacting.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.compact()
+            finally:
+                _compacting.release()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _append(self, entries):
+        data = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        while True:
+            with file_lock(LOCK_FILE, shared=True):
+                try:
+                    append_durable(LOG_FILE, data)
+                    return os.path.getsize(LOG_FILE)
+                except FileNotFoundError:
+                    pass
+            with file_lock(LOCK_FILE):
+                if not os.path.exists(LOG_FILE):
+                    # Only an empty store's size is known without a compaction.
+                    empty = not os.path.exists(SNAPSHOT_FILE) and not os.path.exists(SCORES_FILE)
+                    _start_log(0 if empty else None)
+
+    def save_many(self, entries):
+        if self._append(entries) > COMPACT_BYTES or os.path.exists(SCORES_FILE):
+            self._compact_in_background()
+
+    def count(self):
+        # The log's base plus its lines. A compaction interrupted before the
+        # new log was started leaves the old one, whose base plus lines still
+        # matches the snapshot that absorbed it. None for logs started before
+        # headers had a base; the next compaction adds one. A line torn by a
+        # crash is counted here but not by load(), which only means the
+        # store gets scanned until then.
+        with file_lock(LOCK_FILE, shared=True):
+            try:
+                with open(LOG_FILE, "rb") as f:
+                    header = f.readline()
+                    lines = f.read().count(b"\n")
+            except FileNotFoundError:
+                if os.path.exists(SNAPSHOT_FILE) or os.path.exists(SCORES_FILE):
+                    return None
+                return 0
+        try:
+            base = json.loads(header).get("base")
+        except ValueError:
+            return None
+        return None if base is None else base + lines
+
+    def clear(self):
+        with file_lock(LOCK_FILE):
+            for path in (SCORES_FILE, SNAPSHOT_FILE, LOG_FILE):
+                if os.path.exists(path):
+                    os.remove(path)
+
+def _open_store(backend):
+    if backend == "json":
+        return JsonScoreStore()
+    if backend == "sqlite":
+        from score_sqlite import SqliteScoreStore
+        return SqliteScoreStore()
+    raise ValueError(f"unknown score backend: {backend!r}")
+
+_store = None
+_player_index = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = _open_store(SCORE_BACKEND)
+    return _store
+
+def derived_path(path, backend=None):
+    # The leaderboard and player index are kept per backend, so switching
+    # QUIZ_SCORE_BACKEND never serves rankings built from the other store.
+    # The JSON backend keeps the original file names.
+    backend = backend or SCORE_BACKEND
+    if backend == "json":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{backend}{ext}"
+
+def _leaderboard_path():
+    return derived_path(leaderboard.LEADERBOARD_FILE)
+
+def get_player_index():
+    global _player_index
+    path = derived_path(player_index.PLAYER_INDEX_FILE)
+    if _player_index is None or _player_index.path != path:
+        _player_index = PlayerIndex(path)
+    return _player_index
+
+def make_entry(name, score, total, category):
+    return {
+        "name": name,
+        "score": score,
+        "total": total,
+        "category": category,
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M")
+    }
+
+@metrics.timed("scoring.load_scores")
+def load_scores():
+    return get_store().load()
+
+def compact_scores():
+    store = get_store()
+    if isinstance(store, JsonScoreStore):
+        store.compact()
+
+def _load_leaderboard():
+    board = leaderboard.load(_leaderboard_path())
+    if board is None:
+        board = leaderboard.build(load_scores())
+        leaderboard.save(board, _leaderboard_path())
+    return board
+
+def _ensure_player_index():
+    index = get_player_index()
+    if index.count() is None:
+        index.rebuild(load_scores())
+    return index
+
+@metrics.timed("scoring.write_batch")
+def _save_entries(entries):
+    with file_lock(INDEX_LOCK_FILE):
+        board = _load_leaderboard()
+        index = _ensure_player_index()
+        get_store().save_many(entries)
+        leaderboard.save(leaderboard.add(board, entries), _leaderboard_path())
+        index.add(entries)
+
+class SaveHandle:
+    # Returned by save_scores(); wait() is True once the batch holding these
+    # scores has been written and fsync'd.
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout) and self.error is None
+
+    def _finish(self, error=None):
+        self.error = error
+        self._done.set()
+
+class _GroupCommitWriter:
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._pending = []
+        self._thread = None
+        # Held from taking a batch until it's written, so flush() at exit
+        # waits for a batch the thread is still writing.
+        self._write_lock = threading.Lock()
+
+    def submit(self, entries):
+        handle = SaveHandle()
+        with self._cond:
+            self._pending.append((entries, handle))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return handle
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            time.sleep(self.interval)
+            with self._write_lock:
+                with self._cond:
+                    batch, self._pending = self._pending, []
+                if batch:
+                    self._write(batch)
+
+    def _write(self, batch):
+        entries = [e for group, _ in batch for e in group]
+        try:
+            _save_entries(entries)
+        except Exception as e:
+            for _, handle in batch:
+                handle._finish(e)
+            return
+        for _, handle in batch:
+            handle._finish()
+
+    def flush(self):
+        with self._write_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._write(batch)
+
+_writer = _GroupCommitWriter(FLUSH_INTERVAL)
+atexit.register(_writer.flush)
+
+@metrics.timed("scoring.save_scores")
+def save_scores(results):
+    # results: (name, score, total, category) tuples. Returns immediately.
+    return _writer.submit([make_entry(*r) for r in results])
+
+def save_score(name, score, total, category):
+    handle = save_scores([(name, score, total, category)])
+    handle.wait()
+    if handle.error is not None:
+        raise handle.error
+
+@metrics.timed("scoring.clear_scores")
+def clear_scores():
+    with file_lock(INDEX_LOCK_FILE):
+        get_store().clear()
+        leaderboard.delete(_leaderboard_path())
+        get_player_index().clear()
+
+def rebuild_leaderboard():
+    with file_lock(INDEX_LOCK_FILE):
+        scores = load_scores()
+        leaderboard.save(leaderboard.build(scores), _leaderboard_path())
+    return len(scores)
+
+def check_leaderboard():
+    with file_lock(INDEX_LOCK_FILE, shared=True):
+        board = leaderboard.load(_leaderboard_path()) or leaderboard.empty()
+        return leaderboard.check(board, load_scores())
+
+@metrics.timed("scoring.get_top_scores")
+def get_top_scores(limit=5, category=None):
+    if limit > leaderboard.CAPACITY:
+        if category is None:
+            return get_store().top(limit)
+        scores = [s for s in load_scores() if s["category"] == category]
+        scores.sort(key=lambda s: s["score"], reverse=True)
+        return scores[:limit]
+    with file_lock(INDEX_LOCK_FILE, shared=True):
+        board = leaderboard.load(_leaderboard_path())
+    if board is None:
+        with file_lock(INDEX_LOCK_FILE):
+            board = _load_leaderboard()
+    return leaderboard.top(board, limit, category)
+
+def rebuild_player_index():
+    with file_lock(INDEX_LOCK_FILE):
+        scores = load_scores()
+        get_player_index().rebuild(scores)
+    return len(scores)
+
+def check_player_index():
+    with file_lock(INDEX_LOCK_FILE, shared=True):
+        return get_player_index().check(load_scores())
+
+@metrics.timed("scoring.get_player_stats")
+def get_player_stats(name):
+    # The index answers in one lookup. While it is missing, or has seen a
+    # different number of scores than the store holds, the store answers
+    # instead; the next save or rebuild brings the index back.
+    store = get_store()
+    seen = get_player_index().count()
+    known = store.count()
+    if seen is None or (known is not None and seen != known):
+        return store.player_stats(name)
+    return get_player_index().get(name)
@@ -0,0 +1,167 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from engine import Room, Rules, DEFAULT_RULES
+from questions import build_board
+from timer import QUESTION_TIME_LIMIT
+
+# Plays synthetic Jeopardy games through engine.Room to see how scoring rule
+# changes (time bonus steps, wrong-answer penalty) shape results.
+#
+# Each question, every player independently decides whether to buzz
+# (buzz_rate) and when (lognormal, median buzz_median seconds); the fastest
+# buzzer answers and is right with probability accuracy[points]. As in the
+# app, a wrong answer closes the question, and nobody buzzing is a skip.
+#
+# Games are split into fixed-size chunks, each seeded from (seed, chunk
+# number), so results are identical for any number of workers.
+
+PlayerModel = namedtuple("PlayerModel", "accuracy buzz_rate buzz_median buzz_sigma")
+
+PLAYER_MODELS = {
+    "expert": PlayerModel({200: 0.95, 400: 0.9, 600: 0.85, 800: 0.75, 1000: 0.65}, 0.9, 4.0, 0.5),
+    "average": PlayerModel({200: 0.85, 400: 0.75, 600: 0.6, 800: 0.5, 1000: 0.4}, 0.75, 7.0, 0.6),
+    "novice": PlayerModel({200: 0.7, 400: 0.55, 600: 0.4, 800: 0.3, 1000: 0.2}, 0.6, 11.0, 0.7),
+}
+CHUNK = 2000
+
+Result = namedtuple("Result", "games ties comebacks spread_sum spread_sq margins winners")
+
+def play_game(room, models, rng):
+    cells = list(range(room.cell_count))
+    rng.shuffle(cells)
+    halfway_leaders = None
+    log_medians = [math.log(m.buzz_median) for m in models]
+    for n, cell in enumerate(cells):
+        cat, pts = room.cell_info(cell)
+        room.pick(cat, pts, now=0.0)
+        fastest = None
+        for i, m in enumerate(models):
+            if rng.random() < m.buzz_rate:
+                at = math.exp(rng.gauss(log_medians[i], m.buzz_sigma))
+                if at <= QUESTION_TIME_LIMIT and (fastest is None or at < fastest[1]):
+                    fastest = (i, at)
+        if fastest is None:
+            room.skip()
+        else:
+            i, at = fastest
+            room.award(i, rng.random() < models[i].accuracy[pts], elapsed=at)
+        if n + 1 == len(cells) // 2:
+            top = max(room.scores)
+            halfway_leaders = {i for i, s in enumerate(room.scores) if s == top}
+    return halfway_leaders
+
+def run_chunk(args):
+    seed, chunk, games, model_names, rules = args
+    rng = random.Random(f"{seed}:{chunk}")
+    models = [PLAYER_MODELS[name] for name in model_names]
+    # Which question fills a cell doesn't change the odds, only its value,
+    # but drawing it from rng keeps the whole chunk reproducible.
+    board = build_board(rng=rng)
+    ties = comebacks = 0
+    spread_sum = spread_sq = 0.0
+    margins = Counter()
+    winners = Counter()
+    for _ in range(games):
+        room = Room(None, model_names, board, rules=rules)
+        halfway_leaders = play_game(room, models, rng)
+        ranked = sorted(room.scores, reverse=True)
+        top = ranked[0]
+        leaders = [i for i, s in enumerate(room.scores) if s == top]
+        if len(leaders) > 1:
+            ties += 1
+        else:
+            winners[leaders[0]] += 1
+            if leaders[0] not in halfway_leaders:
+                comebacks += 1
+        if len(ranked) > 1:
+            margins[top - ranked[1]] += 1
+        spread = ranked[0] - ranked[-1]
+        spread_sum += spread
+        spread_sq += spread * spread
+    return Result(games, ties, comebacks, spread_sum, spread_sq, margins, winners)
+
+def merge(results):
+    margins = Counter()
+    winners = Counter()
+    for r in results:
+        margins.update(r.margins)
+        winners.update(r.winners)
+    return Result(sum(r.games for r in results), sum(r.ties for r in results),
+                  sum(r.comebacks for r in results), sum(r.spread_sum for r in results),
+                  sum(r.spread_sq for r in results), margins, winners)
+
+def percentile(counts, p):
+    target = p * sum(counts.values())
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= target:
+            return value
+    return None
+
+def simulate(games, model_names, rules=DEFAULT_RULES, seed=0, workers=None):
+    chunks = [(seed, c, min(CHUNK, games - c * CHUNK), tuple(model_names), rules)
+              for c in range(math.ceil(games / CHUNK))]
+    if workers == 1:
+        results = list(map(run_chunk, chunks))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(run_chunk, chunks))
+    return merge(results)
+
+def report(result, model_names, elapsed):
+    n = result.games
+    decided = n - result.ties
+    mean = result.spread_sum / n
+    std = math.sqrt(max(0.0, result.spread_sq / n - mean * mean))
+    print(f"{n:,} games in {elapsed:.1f}s ({n / elapsed:,.0f} games/s)")
+    print(f"  first-to-last spread: mean ${mean:,.0f}, std ${std:,.0f}")
+    if result.margins:
+        # Solo games have no runner-up to measure against.
+        print("  winner margin: " + ", ".join(
+            f"p{int(p * 100)} ${percentile(result.margins, p):,}" for p in (0.1, 0.5, 0.9, 0.99)))
+    print(f"  comebacks (winner wasn't leading at halfway): {result.comebacks / max(decided, 1):.1%}")
+    print(f"  ties for first: {result.ties / n:.1%}")
+    for i, name in enumerate(model_names):
+        print(f"  player {i + 1} ({name}) wins {result.winners[i] / n:.1%}")
+
+def parse_steps(text):
+    # "10:1.5,20:1.0" -> ((10.0, 1.5), (20.0, 1.0))
+    return tuple((float(limit), float(bonus))
+                 for limit, bonus in (step.split(":") for step in text.split(",")))
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="simulate.py", description="Monte Carlo scoring rule simulator")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--players", default="expert,average,novice",
+                        help="comma-separated models: " + ", ".join(PLAYER_MODELS))
+    parser.add_argument("--bonus", type=parse_steps, default=DEFAULT_RULES.bonus_steps,
+                        help="time bonus steps as SECONDS:MULTIPLIER,... (default 10:1.5,20:1.0)")
+    parser.add_argument("--slow-bonus", type=float, default=DEFAULT_RULES.slow_bonus)
+    parser.add_argument("--penalty", type=float, default=DEFAULT_RULES.wrong_penalty,
+                        help="fraction of a cell's value lost on a wrong answer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv[1:])
+
+    model_names = args.players.split(",")
+    unknown = [m for m in model_names if m not in PLAYER_MODELS]
+    if unknown:
+        parser.error(f"unknown player model(s): {', '.join(unknown)}")
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    rules = Rules(args.bonus, args.slow_bonus, args.penalty)
+
+    start = time.perf_counter()
+    result = simulate(args.games, model_names, rules, args.seed, args.workers)
+    report(result, model_names, time.perf_counter() - start)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,85 +1,294 @@
-import streamlit as st
-import struct
 import base64
 import io
+import sys
+import threading
+import time
 import wave
 import math
+from array import array
+from collections import OrderedDict, namedtuple
 
-def generate_tone(frequency, duration, volume=0.5, sample_rate=22050):
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Gain curves over a note, as functions of (sample index, sample count).
+# "fade" is the original tone shape: full volume, then a linear fade over the
+# last 30%.
+ENVELOPES = ("fade", "flat", "decay")
+
+def _tone_pcm_numpy(frequency, n_samples, volume, sample_rate, envelope):
+    i = np.arange(n_samples, dtype=np.float64)
+    if envelope == "fade":
+        gain = np.ones(n_samples)
+        tail = i > n_samples * 0.7
+        gain[tail] = (n_samples - i[tail]) / (n_samples * 0.3)
+    elif envelope == "decay":
+        gain = (n_samples - i) / n_samples
+    else:
+        gain = 1.0
+    value = volume * gain * np.sin(2 * math.pi * frequency * (i / sample_rate))
+    return (value * 32767).astype("<i2").tobytes()
+
+def _gain(envelope, n_samples):
+    if envelope == "fade":
+        fade_start = n_samples * 0.7
+        fade_len = n_samples * 0.3
+        return lambda i: (n_samples - i) / fade_len if i > fade_start else 1.0
+    if envelope == "decay":
+        return lambda i: (n_samples - i) / n_samples
+    return lambda i: 1.0
+
+def _tone_pcm_array(frequency, n_samples, volume, sample_rate, envelope):
+    w = 2 * math.pi * frequency
+    gain = _gain(envelope, n_samples)
+    sin = math.sin
+    pcm = array("h", [
+        int(volume * gain(i) * sin(w * (i / sample_rate)) * 32767)
+        for i in range(n_samples)
+    ])
+    if sys.byteorder == "big":
+        pcm.byteswap()
+    return pcm.tobytes()
+
+def tone_pcm(frequency, duration, volume=0.5, sample_rate=22050, envelope="fade"):
+    # 16-bit little-endian mono samples of a sine shaped by one of ENVELOPES.
+    # NumPy computes the whole buffer at once when installed.
+    if envelope not in ENVELOPES:
+        raise ValueError(f"unknown envelope: {envelope!r}")
     n_samples = int(sample_rate * duration)
-    samples = []
-    for i in range(n_samples):
-        t = i / sample_rate
-        fade = 1.0
-        if i > n_samples * 0.7:
-            fade = (n_samples - i) / (n_samples * 0.3)
-        value = volume * fade * math.sin(2 * math.pi * frequency * t)
-        samples.append(int(value * 32767))
+    if np is not None:
+        return _tone_pcm_numpy(frequency, n_samples, volume, sample_rate, envelope)
+    return _tone_pcm_array(frequency, n_samples, volume, sample_rate, envelope)
 
+def encode_wav(pcm, sample_rate=22050):
     buf = io.BytesIO()
     with wave.open(buf, 'wb') as wf:
         wf.setnchannels(1)
         wf.setsampwidth(2)
         wf.setframerate(sample_rate)
-        for s in samples:
-            wf.writeframes(struct.pack('<h', s))
+        wf.writeframes(pcm)
     return buf.getvalue()
 
-def generate_correct_sound():
-    s1 = generate_tone(523, 0.15, 0.4)
-    s2 = generate_tone(659, 0.15, 0.4)
-    s3 = generate_tone(784, 0.25, 0.4)
+def generate_tone(frequency, duration, volume=0.5, sample_rate=22050):
+    return encode_wav(tone_pcm(frequency, duration, volume, sample_rate), sample_rate)
 
-    buf = io.BytesIO()
-    with wave.open(buf, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(22050)
-        for src in [s1, s2, s3]:
-            r = io.BytesIO(src)
-            with wave.open(r, 'rb') as rf:
-                wf.writeframes(rf.readframes(rf.getnframes()))
-    return buf.getvalue()
+class Note(namedtuple("Note", "frequency duration volume envelope")):
+    __slots__ = ()
 
-def generate_wrong_sound():
-    s1 = generate_tone(200, 0.3, 0.4)
-    s2 = generate_tone(150, 0.4, 0.3)
+    def __new__(cls, frequency, duration, volume=0.5, envelope="fade"):
+        return super().__new__(cls, frequency, duration, volume, envelope)
 
-    buf = io.BytesIO()
-    with wave.open(buf, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(22050)
-        for src in [s1, s2]:
-            r = io.BytesIO(src)
-            with wave.open(r, 'rb') as rf:
-                wf.writeframes(rf.readframes(rf.getnframes()))
-    return buf.getvalue()
+def _mix(parts):
+    # Sums equal-or-shorter PCM buffers sample by sample, clipping to 16 bits.
+    if len(parts) == 1:
+        return parts[0]
+    length = max(len(p) for p in parts)
+    if np is not None:
+        acc = np.zeros(length // 2, dtype=np.int32)
+        for p in parts:
+            samples = np.frombuffer(p, dtype="<i2")
+            acc[:len(samples)] += samples
+        return np.clip(acc, -32768, 32767).astype("<i2").tobytes()
+    acc = array("i", bytes(4 * (length // 2)))
+    for p in parts:
+        samples = array("h", p)
+        if sys.byteorder == "big":
+            samples.byteswap()
+        for i, v in enumerate(samples):
+            acc[i] += v
+    out = array("h", [max(-32768, min(32767, v)) for v in acc])
+    if sys.byteorder == "big":
+        out.byteswap()
+    return out.tobytes()
+
+def compose(steps, sample_rate=22050):
+    # steps play one after another; each is a Note, or a tuple of Notes that
+    # start together (a chord) and last as long as the longest of them.
+    # Everything stays raw PCM until the single encode in render_wav().
+    pcm = []
+    for step in steps:
+        notes = (step,) if isinstance(step, Note) else step
+        pcm.append(_mix([
+            tone_pcm(n.frequency, n.duration, n.volume, sample_rate, n.envelope)
+            for n in notes
+        ]))
+    return b"".join(pcm)
+
+def render_wav(steps, sample_rate=22050):
+    return encode_wav(compose(steps, sample_rate), sample_rate)
+
+def generate_correct_sound():
+    return render_wav([Note(523, 0.15, 0.4), Note(659, 0.15, 0.4), Note(784, 0.25, 0.4)])
+
+def generate_wrong_sound():
+    return render_wav([Note(200, 0.3, 0.4), Note(150, 0.4, 0.3)])
 
 def generate_select_sound():
-    return generate_tone(440, 0.1, 0.3)
+    return render_wav([Note(440, 0.1, 0.3)])
 
 def generate_victory_sound():
-    notes = [523, 659, 784, 1047]
-    parts = []
-    for note in notes:
-        parts.append(generate_tone(note, 0.2, 0.4))
+    return render_wav([Note(note, 0.2, 0.4) for note in (523, 659, 784, 1047)])
 
-    buf = io.BytesIO()
-    with wave.open(buf, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(22050)
-        for src in parts:
-            r = io.BytesIO(src)
-            with wave.open(r, 'rb') as rf:
-                wf.writeframes(rf.readframes(rf.getnframes()))
-    return buf.getvalue()
+def generate_buzzer_sound():
+    return render_wav([(Note(110, 0.6, 0.3, "flat"), Note(117, 0.6, 0.3, "fade"))])
 
-def play_sound(wav_data):
-    b64 = base64.b64encode(wav_data).decode()
+def generate_tick_sound():
+    return render_wav([Note(1200, 0.03, 0.3, "decay")])
+
+def generate_daily_double_sound():
+    return render_wav([
+        Note(392, 0.1, 0.35), Note(523, 0.1, 0.35), Note(659, 0.1, 0.35),
+        (Note(523, 0.5, 0.25), Note(659, 0.5, 0.25), Note(784, 0.5, 0.25)),
+    ])
+
+SOUND_GENERATORS = {
+    "correct": generate_correct_sound,
+    "wrong": generate_wrong_sound,
+    "select": generate_select_sound,
+    "victory": generate_victory_sound,
+    "buzzer": generate_buzzer_sound,
+    "tick": generate_tick_sound,
+    "daily_double": generate_daily_double_sound,
+}
+
+def register_sound(name, generator):
+    # Custom or themed effects; rendered on first use like the built-ins.
+    SOUND_GENERATORS[name] = generator
+    sound_cache.discard(name)
+
+def wav_data_uri(wav_data):
+    return "data:audio/wav;base64," + base64.b64encode(wav_data).decode()
+
+class RenderedSound:
+    __slots__ = ("wav", "data_uri")
+
+    def __init__(self, wav):
+        self.wav = wav
+        self.data_uri = wav_data_uri(wav)
+
+    def size(self):
+        return len(self.wav) + len(self.data_uri)
+
+class SoundCache:
+    # Rendered effects shared by every session in the process, evicted least
+    # recently used first once they hold more than max_bytes. Listeners are
+    # called as listener(event, name, seconds) with event "hit", "miss" or
+    # "evict"; seconds is the render time for a miss and 0 otherwise.
+
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.render_seconds = 0.0
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, name, seconds=0.0):
+        for listener in self._listeners:
+            listener(event, name, seconds)
+
+    def get(self, name):
+        with self._lock:
+            sound = self._entries.get(name)
+            if sound is not None:
+                self._entries.move_to_end(name)
+                self.hits += 1
+        if sound is not None:
+            self._notify("hit", name)
+            return sound
+
+        start = time.perf_counter()
+        sound = RenderedSound(SOUND_GENERATORS[name]())
+        seconds = time.perf_counter() - start
+        evicted = []
+        with self._lock:
+            self.misses += 1
+            self.render_seconds += seconds
+            if name not in self._entries:
+                self._entries[name] = sound
+                self._bytes += sound.size()
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_name, old = self._entries.popitem(last=False)
+                self._bytes -= old.size()
+                self.evictions += 1
+                evicted.append(old_name)
+        self._notify("miss", name, seconds)
+        for old_name in evicted:
+            self._notify("evict", old_name)
+        return sound
+
+    def discard(self, name):
+        with self._lock:
+            sound = self._entries.pop(name, None)
+            if sound is not None:
+                self._bytes -= sound.size()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "render_seconds": self.render_seconds,
+            }
+
+sound_cache = SoundCache()
+_warm_started = threading.Event()
+
+def warm_sound_cache(names=None):
+    # Renders the effects on a background thread, once per process.
+    if _warm_started.is_set():
+        return
+    _warm_started.set()
+    names = list(names or SOUND_GENERATORS)
+
+    def run():
+        for name in names:
+            sound_cache.get(name)
+
+    threading.Thread(target=run, daemon=True).start()
+
+SPRITE_GAP = 0.1
+
+def build_sprite(names=None, sample_rate=22050):
+    # All effects back to back in one WAV, separated by short silences so a
+    # clip never bleeds into the next. Returns the WAV and {name: (start, end)}
+    # in seconds.
+    gap = bytes(2 * int(sample_rate * SPRITE_GAP))
+    parts = []
+    offsets = {}
+    at = 0
+    for name in names or SOUND_GENERATORS:
+        with wave.open(io.BytesIO(sound_cache.get(name).wav), 'rb') as rf:
+            pcm = rf.readframes(rf.getnframes())
+        offsets[name] = (at / 2 / sample_rate, (at + len(pcm)) / 2 / sample_rate)
+        parts.append(pcm)
+        parts.append(gap)
+        at += len(pcm) + len(gap)
+    return encode_wav(b"".join(parts), sample_rate), offsets
+
+def _play_data_uri(data_uri):
+    import streamlit as st
     st.markdown(f"""
         <audio autoplay>
-            <source src="data:audio/wav;base64,{b64}" type="audio/wav">
+            <source src="{data_uri}" type="audio/wav">
         </audio>
     """, unsafe_allow_html=True)
+
+def play_sound(wav_data):
+    _play_data_uri(wav_data_uri(wav_data))
+
+def play_effect(name):
+    _play_data_uri(sound_cache.get(name).data_uri)
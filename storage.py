@@ -0,0 +1,47 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+_local_lock = threading.RLock()
+
+@contextmanager
+def file_lock(path, shared=False):
+    # Advisory lock shared by every process using the same data directory.
+    # Without fcntl (Windows) this only serializes threads in this process.
+    if fcntl is None:
+        with _local_lock:
+            yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def atomic_write(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def atomic_write_json(path, obj):
+    atomic_write(path, json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+def append_durable(path, data):
+    # One write() on an O_APPEND descriptor, so concurrent appenders never
+    # interleave inside a line.
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    try:
+        os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,22 @@
+import os
+import shutil
+import pytest
+from benchmarks.synthetic import use_data_dir, use_question_dir
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # Scores, indexes and stats go to a scratch directory, never data/.
+    path = tmp_path / "data"
+    path.mkdir()
+    use_data_dir(str(path))
+    return path
+
+@pytest.fixture
+def question_dir(tmp_path):
+    path = tmp_path / "questions"
+    path.mkdir()
+    shutil.copy(os.path.join(ROOT, "data", "questions.json"), path)
+    use_question_dir(str(path))
+    return path
@@ -0,0 +1,13 @@
+import socket
+import pytest
+import buzzer
+
+def test_bind_failure_raises_and_is_not_kept(monkeypatch):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        monkeypatch.setattr(buzzer, "BUZZER_ADDRESS", "127.0.0.1:%d" % taken.getsockname()[1])
+        monkeypatch.setattr(buzzer, "_server", None)
+        with pytest.raises(OSError):
+            buzzer.get_server()
+        assert buzzer._server is None
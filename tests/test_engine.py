@@ -0,0 +1,34 @@
+import threading
+import pytest
+import engine
+
+def test_concurrent_picks_open_one_question(question_dir):
+    room = engine.Room("TEST", ["A", "B"])
+    cat, pts = room.categories[0], room.point_values[0]
+    start = threading.Barrier(8)
+    picked = []
+
+    def pick():
+        start.wait()
+        try:
+            room.pick(cat, pts)
+            picked.append(True)
+        except ValueError:
+            picked.append(False)
+
+    threads = [threading.Thread(target=pick) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert picked.count(True) == 1
+
+def test_stale_award_is_refused(question_dir):
+    room = engine.Room("TEST", ["A", "B"])
+    room.pick(room.categories[0], room.point_values[0])
+    room.award(0, True, elapsed=1.0)
+    with pytest.raises(ValueError):
+        room.award(1, True, elapsed=2.0)
+    with pytest.raises(ValueError):
+        room.skip()
+    assert room.scores[1] == 0
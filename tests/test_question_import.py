@@ -0,0 +1,30 @@
+import pytest
+from question_import import validate
+
+POINTS = (200, 400, 600, 800, 1000)
+
+def row(**changes):
+    base = {"category": "Science", "question": "Red planet?", "options": "Mars|Venus",
+            "answer": "Mars", "points": "200"}
+    base.update(changes)
+    return base
+
+def test_whitespace_only_fields_are_missing():
+    with pytest.raises(ValueError, match="missing question"):
+        validate(row(question="   "), POINTS)
+    with pytest.raises(ValueError, match="options"):
+        validate(row(options=["Mars", "  "]), POINTS)
+
+@pytest.mark.parametrize("points", [200.7, "200.7", True, "x", None, [200]])
+def test_points_must_be_whole_numbers(points):
+    with pytest.raises(ValueError):
+        validate(row(points=points), POINTS)
+
+@pytest.mark.parametrize("points", [200, "200", " 200 ", 200.0])
+def test_whole_points_are_accepted(points):
+    assert validate(row(points=points), POINTS)[1]["points"] == 200
+
+def test_fields_are_stripped():
+    category, q = validate(row(category=" Science ", question=" Red planet? ", answer=" Mars "), POINTS)
+    assert category == "Science"
+    assert q["question"] == "Red planet?" and q["answer"] == "Mars"
@@ -0,0 +1,22 @@
+import scoring
+
+def test_stale_player_index_falls_back_to_store(data_dir):
+    scoring.save_score("Ada", 3, 5, "science")
+    assert scoring.get_player_stats("Ada")["games"] == 1
+    # Saved behind the index's back, as a crash between the two writes would.
+    scoring.get_store().save_many([scoring.make_entry("Ada", 4, 5, "history")])
+    assert scoring.get_player_index().count() == 1
+    assert scoring.get_store().count() == 2
+    assert scoring.get_player_stats("Ada")["games"] == 2
+    scoring.rebuild_player_index()
+    assert scoring.get_player_index().count() == 2
+
+def test_json_count_survives_compaction(data_dir):
+    store = scoring.get_store()
+    assert store.count() == 0
+    store.save_many([scoring.make_entry(f"P{i}", i, 10, "science") for i in range(5)])
+    store.compact()
+    store.save_many([scoring.make_entry("Q", 1, 10, "history")])
+    assert store.count() == len(store.load()) == 6
+    store.clear()
+    assert store.count() == 0
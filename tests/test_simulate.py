@@ -0,0 +1,11 @@
+import simulate
+
+def test_single_player_skips_winner_margin(question_dir, capsys):
+    assert simulate.main(["simulate.py", "--players", "expert", "--games", "20", "--workers", "1"]) == 0
+    out = capsys.readouterr().out
+    assert "winner margin" not in out
+    assert "player 1 (expert) wins" in out
+
+def test_margin_reported_for_two_players(question_dir, capsys):
+    assert simulate.main(["simulate.py", "--players", "expert,novice", "--games", "20", "--workers", "1"]) == 0
+    assert "winner margin: p10 $" in capsys.readouterr().out
@@ -1,19 +1,23 @@
 import time
 
 QUESTION_TIME_LIMIT = 30
+# (answered within seconds, multiplier), checked in order; slower answers get
+# SLOW_BONUS.
+BONUS_STEPS = ((10, 1.5), (20, 1.0))
+SLOW_BONUS = 0.5
 
 def get_time_remaining(start_time):
     elapsed = time.time() - start_time
     return max(0, QUESTION_TIME_LIMIT - elapsed)
 
+def time_bonus(elapsed, steps=BONUS_STEPS, slow=SLOW_BONUS):
+    for limit, bonus in steps:
+        if elapsed <= limit:
+            return bonus
+    return slow
+
 def get_time_bonus(start_time):
-    elapsed = time.time() - start_time
-    if elapsed <= 10:
-        return 1.5
-    elif elapsed <= 20:
-        return 1.0
-    else:
-        return 0.5
+    return time_bonus(time.time() - start_time)
 
 def is_time_up(start_time):
     return time.time() - start_time >= QUESTION_TIME_LIMIT
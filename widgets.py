@@ -0,0 +1,65 @@
+import hashlib
+import os
+from storage import atomic_write
+
+COMPONENTS_DIR = os.path.join(os.path.dirname(__file__), "components")
+# sfx_player is served from here rather than from COMPONENTS_DIR, so the
+# generated sprite never lands in the source tree.
+SFX_PLAYER_DIR = os.path.join(os.path.dirname(__file__), "data", "sfx_player")
+
+_components = {}
+
+def _component(name, path=None):
+    if name not in _components:
+        import streamlit.components.v1 as components
+        _components[name] = components.declare_component(
+            name, path=path or os.path.join(COMPONENTS_DIR, name))
+    return _components[name]
+
+def _write_if_changed(path, data):
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return
+    atomic_write(path, data)
+
+_sprite = None
+
+def _ensure_sprite():
+    # The sprite sits next to a copy of the component's index.html so the
+    # browser fetches it over plain HTTP once and caches it; the version in
+    # the URL changes whenever the effects do. Registering or replacing an
+    # effect rebuilds it.
+    global _sprite
+    from sounds import SOUND_GENERATORS, build_sprite
+    effects = tuple(SOUND_GENERATORS.items())
+    if _sprite is None or _sprite[0] != effects:
+        wav, offsets = build_sprite()
+        version = hashlib.sha1(wav).hexdigest()[:12]
+        with open(os.path.join(COMPONENTS_DIR, "sfx_player", "index.html"), "rb") as f:
+            html = f.read()
+        os.makedirs(SFX_PLAYER_DIR, exist_ok=True)
+        _write_if_changed(os.path.join(SFX_PLAYER_DIR, "index.html"), html)
+        _write_if_changed(os.path.join(SFX_PLAYER_DIR, "sprite.wav"), wav)
+        _sprite = (effects, version, offsets)
+    return _sprite
+
+def sfx_player(effect, event_id, key="sfx"):
+    # Render on every full run at the same place in the page so the iframe,
+    # and the decoded sprite inside it, survive reruns. Each run sends only
+    # the effect's offsets; the client plays it when event_id changes.
+    _, version, offsets = _ensure_sprite()
+    event = None
+    if effect is not None:
+        start, end = offsets[effect]
+        event = {"id": event_id, "start": start, "end": end}
+    _component("sfx_player", SFX_PLAYER_DIR)(
+        sprite=f"sprite.wav?v={version}", event=event, key=key, default=None)
+
+def question_timer(limit, question, paused, request, key="question_timer", on_change=None):
+    # Persistent countdown for the current question; see
+    # components/question_timer/index.html for the protocol. Returns the
+    # last {request, question, elapsed} reply, or None.
+    return _component("question_timer")(
+        limit=limit, question=question, paused=paused, request=request,
+        key=key, on_change=on_change, default=None)